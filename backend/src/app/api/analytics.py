@@ -5,10 +5,16 @@ This module provides API endpoints for:
 - Calculation of total monthly spending
 - Category-based spending breakdown
 - Subscription search capabilities
+- ETag validation so unchanged analytics can be answered with 304
 """
-from fastapi import APIRouter, Query, Depends, status
+import base64
+import binascii
+import hashlib
+import math
+import secrets
+
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response, status
 from typing import List, Dict, Any, Optional
-from collections import defaultdict
 
 from src.app.models.subscription import Subscription
 from src.app.models.user import User
@@ -18,13 +24,81 @@ from src.app.core.logging import application_logger
 
 router = APIRouter(tags=["Analytics"])
 
+# Per-process seed so ETags issued before a restart never match afterwards
+ETAG_SEED = secrets.token_hex(8)
+
+def build_analytics_etag(user: User, view: str) -> str:
+    """
+    Build a strong ETag for an analytics view of a user's subscriptions
+    
+    Args:
+        user: User whose data the view is computed from
+        view: Name of the analytics view (e.g. "summary")
+    
+    Returns:
+        Quoted ETag value that changes whenever the subscriptions change
+    """
+    key = f"{ETAG_SEED}:{view}:{user.email}:{user.subscriptions_version}"
+    return f'"{hashlib.blake2b(key.encode(), digest_size=8).hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check whether the request's If-None-Match header matches an ETag
+    
+    Args:
+        request: Incoming request
+        etag: Current ETag of the requested resource
+    
+    Returns:
+        True if the client's cached copy is still current
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    
+    candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+def encode_search_cursor(service_name_lc: str) -> str:
+    """
+    Encode a subscription name as an opaque, header-safe search cursor
+    
+    Headers are sent as latin-1, so names are base64-encoded (URL-safe,
+    without padding) rather than placed in the header as-is.
+    """
+    return base64.urlsafe_b64encode(service_name_lc.encode()).decode().rstrip("=")
+
+def decode_search_cursor(cursor: str) -> Optional[str]:
+    """
+    Decode a search cursor back to the subscription name it points at
+    
+    Returns:
+        The lowercased subscription name, or None if the cursor is malformed
+    """
+    try:
+        return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+
+def not_modified_response(etag: str) -> Response:
+    """Build an empty 304 response carrying the current ETag"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
+
 @router.get("/search", response_model=List[Subscription])
 def search_subscriptions(
+    response: Response,
     term: str = Query(
         None,
         description="Search term to filter subscriptions by name or category",
         examples={"partial_match": {"value": "netflix"}, "category": {"value": "entertainment"}}
     ),
+    cursor: Optional[str] = Query(
+        None, min_length=1, description="Cursor returned in the X-Next-Cursor header of the previous page"
+    ),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of subscriptions to return"),
     current_user: User = Depends(get_current_user)
 ) -> List[Subscription]:
     """
@@ -34,52 +108,79 @@ def search_subscriptions(
     service names and categories (case-insensitive partial matching).
     Returns all subscriptions if no search term is provided.
     
+    Results are paginated with a keyset cursor: the encoded lowercased name
+    of the last returned subscription. Scanning resumes right after that
+    subscription wherever it sits now, so adding or deleting other
+    subscriptions between pages neither skips nor repeats matches, and
+    deep pages cost the same as the first one. When more matches remain,
+    the cursor for the next page is sent in the X-Next-Cursor response
+    header. A malformed cursor, or one naming a subscription that no
+    longer exists, is rejected with 400.
+    
     Args:
+        response: Outgoing response, used to expose the next cursor
         term: Optional search term for filtering
+        cursor: Optional cursor from a previous page
+        limit: Optional maximum number of matches to return
         current_user: Authenticated user from the security dependency
     
     Returns:
         List of matching subscription objects
     """
-    # If no search term, return all subscriptions
-    if not term:
-        return current_user.subscriptions
+    subscriptions = current_user.subscriptions
+    start = 0
+    if cursor is not None:
+        cursor_name = decode_search_cursor(cursor)
+        cursor_position = -1 if cursor_name is None else current_user.find_subscription(cursor_name)[0]
+        if cursor_position == -1:
+            application_logger.warning("User [%s] searched with a stale cursor: [%s]", current_user.email, cursor)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor no longer matches a subscription, restart from the first page"
+            )
+        start = cursor_position + 1
     
-    # Convert to lowercase for case-insensitive matching
-    term_lower = term.lower()
+    # Normalize the search term once rather than per comparison
+    term_lower = term.lower() if term else None
     
-    # Filter subscriptions by name or category (case-insensitive)
-    matching_subscriptions = [
-        subscription for subscription in current_user.subscriptions
-        if term_lower in subscription.service_name.lower() or 
-           term_lower in subscription.category.lower()
-    ]
+    page: List[Subscription] = []
+    for position in range(start, len(subscriptions)):
+        subscription = subscriptions[position]
+        
+        # Filter subscriptions by name or category (case-insensitive)
+        if term_lower is not None and not (
+            term_lower in subscription.service_name_lc or 
+            term_lower in subscription.category_lc
+        ):
+            continue
+        
+        # A match beyond the requested page means another page exists
+        if limit is not None and len(page) == limit:
+            response.headers["X-Next-Cursor"] = encode_search_cursor(page[-1].service_name_lc)
+            break
+        
+        page.append(subscription)
     
-    subscription_count = len(matching_subscriptions)
-    application_logger.info(
-        f"User [{current_user.email}] searched for [{term}], found [{subscription_count}] matches"
-    )
+    if term:
+        application_logger.info(
+            "User [%s] searched for [%s], returned [%s] matches", current_user.email, term, len(page)
+        )
     
-    return matching_subscriptions
+    return page
 
-@router.get("/summary", response_model=Dict[str, Any])
-def get_spending_summary(current_user: User = Depends(get_current_user)) -> Dict[str, Any]:
+def build_spending_summary(user: User) -> Dict[str, Any]:
     """
-    Get summary of monthly subscription spending
-    
-    Calculates total monthly spending across all subscriptions,
-    average cost per subscription, and total number of subscriptions.
+    Compute monthly spending metrics for a user's subscriptions
     
     Args:
-        current_user: Authenticated user from the security dependency
+        user: User whose subscriptions are summarized
     
     Returns:
         Dictionary with spending metrics and subscription counts
     """
-    subscription_count = len(current_user.subscriptions)
+    subscription_count = len(user.subscriptions)
     
     if subscription_count == 0:
-        application_logger.info(f"User [{current_user.email}] has no subscriptions for summary")
         return {
             "total_monthly_cost": 0,
             "average_subscription_price": 0,
@@ -88,71 +189,132 @@ def get_spending_summary(current_user: User = Depends(get_current_user)) -> Dict
             "subscription_list": []
         }
     
-    # Calculate total in a single pass
-    total_spend = sum(sub.monthly_price for sub in current_user.subscriptions)
+    # Sum over the packed price array instead of the model objects;
+    # fsum keeps the total exact when cents are added to large prices
+    total_spend = math.fsum(user.monthly_prices())
     average_price = total_spend / subscription_count
     
-    application_logger.info(
-        f"User [{current_user.email}] viewed spending summary: "
-        f"${total_spend:.2f}/month across [{subscription_count}] subscriptions"
-    )
-    
     return {
         "total_monthly_cost": total_spend,
         "average_subscription_price": average_price,
         "subscription_count": subscription_count,
         "formatted_total": format_currency(total_spend),
-        "subscription_list": current_user.subscriptions
+        "subscription_list": user.subscriptions
     }
 
+def build_spending_by_category(user: User) -> Dict[str, Any]:
+    """
+    Group a user's subscriptions by category with spending totals
+    
+    Categories are ordered by highest spending first. The order is
+    set once here, when the cached view is built, rather than per GET.
+    
+    Args:
+        user: User whose subscriptions are grouped
+    
+    Returns:
+        Dictionary of categories with spending data
+    """
+    # Groups are maintained incrementally on the user; only C rows to visit
+    category_groups = user.category_groups()
+    
+    # The overall total only needs the per-category rows
+    total_cost = math.fsum(group["total_cost"] for group in category_groups.values())
+    
+    categorized_subscriptions: Dict[str, Any] = {}
+    ranked_groups = sorted(category_groups.items(), key=lambda item: item[1]["total_cost"], reverse=True)
+    for category, group in ranked_groups:
+        category_total = group["total_cost"]
+        categorized_subscriptions[category] = {
+            "subscriptions": group["subscriptions"],
+            "count": len(group["subscriptions"]),
+            "total_cost": category_total,
+            # Handle zero total cost case
+            "percentage": (category_total / total_cost) * 100 if total_cost > 0 else 0,
+            "formatted_cost": format_currency(category_total)
+        }
+    
+    return categorized_subscriptions
+
+@router.get("/summary", response_model=Dict[str, Any])
+def get_spending_summary(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get summary of monthly subscription spending
+    
+    Calculates total monthly spending across all subscriptions,
+    average cost per subscription, and total number of subscriptions.
+    The result is cached on the user until their subscriptions change,
+    and clients sending a matching If-None-Match get a bodyless 304.
+    
+    Args:
+        request: Incoming request, checked for If-None-Match
+        response: Outgoing response, used to set the ETag
+        current_user: Authenticated user from the security dependency
+    
+    Returns:
+        Dictionary with spending metrics and subscription counts
+    """
+    etag = build_analytics_etag(current_user, "summary")
+    if etag_matches(request, etag):
+        application_logger.debug("User [%s] spending summary not modified", current_user.email)
+        return not_modified_response(etag)
+    
+    summary = current_user.cached_analytics(
+        "summary", lambda: build_spending_summary(current_user)
+    )
+    
+    if summary["subscription_count"] == 0:
+        application_logger.info("User [%s] has no subscriptions for summary", current_user.email)
+    else:
+        application_logger.info(
+            "User [%s] viewed spending summary: "
+            "$%.2f/month across [%s] subscriptions",
+            current_user.email, summary['total_monthly_cost'], summary['subscription_count']
+        )
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return summary
+
 @router.get("/categories", response_model=Dict[str, Any])
-def get_spending_by_category(current_user: User = Depends(get_current_user)) -> Dict[str, Any]:
+def get_spending_by_category(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
     """
     Get breakdown of spending by category
     
     Groups subscriptions by their category and calculates total spending
-    for each category, sorted by highest spending first.
+    for each category, sorted by highest spending first. The result is
+    cached on the user until their subscriptions change, and clients
+    sending a matching If-None-Match get a bodyless 304.
     
     Args:
+        request: Incoming request, checked for If-None-Match
+        response: Outgoing response, used to set the ETag
         current_user: Authenticated user from the security dependency
         
     Returns:
         Dictionary of categories with spending data
     """
-    # Use defaultdict to simplify category creation
-    categorized_subscriptions = defaultdict(lambda: {
-        "subscriptions": [],
-        "count": 0,
-        "total_cost": 0
-    })
-    
-    # Process all subscriptions in a single pass
-    total_cost = 0
-    for subscription in current_user.subscriptions:
-        category = subscription.category
-        category_data = categorized_subscriptions[category]
-        
-        # Update category data
-        category_data["subscriptions"].append(subscription)
-        category_data["count"] += 1
-        category_data["total_cost"] += subscription.monthly_price
-        total_cost += subscription.monthly_price
-    
-    # Calculate percentages and format costs
-    if total_cost > 0:
-        for category_data in categorized_subscriptions.values():
-            category_data["percentage"] = (category_data["total_cost"] / total_cost) * 100
-            category_data["formatted_cost"] = format_currency(category_data["total_cost"])
-    else:
-        # Handle zero total cost case
-        for category_data in categorized_subscriptions.values():
-            category_data["percentage"] = 0
-            category_data["formatted_cost"] = format_currency(0)
+    etag = build_analytics_etag(current_user, "categories")
+    if etag_matches(request, etag):
+        application_logger.debug("User [%s] spending breakdown not modified", current_user.email)
+        return not_modified_response(etag)
+    
+    categories = current_user.cached_analytics(
+        "categories", lambda: build_spending_by_category(current_user)
+    )
     
-    category_count = len(categorized_subscriptions)
     application_logger.info(
-        f"User [{current_user.email}] viewed spending breakdown across [{category_count}] categories"
+        "User [%s] viewed spending breakdown across [%s] categories", current_user.email, len(categories)
     )
     
-    # Convert defaultdict to regular dict for serialization
-    return dict(categorized_subscriptions)
\ No newline at end of file
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return categories
@@ -16,12 +16,9 @@ from src.app.core.security import (
     hash_password, verify_password, get_current_user, oauth2_scheme, 
     get_user_email_from_session, create_access_token
 )
-from src.app.db.storage import user_database, active_sessions, save_data_to_file
+from src.app.db.storage import user_database, email_to_token, discard_session, log_mutation
 from src.app.core.logging import application_logger
 
-# Map of email to active tokens for faster session invalidation
-email_to_token_map: Dict[str, str] = {}
-
 router = APIRouter(tags=["Auth"])
 
 @router.post("/register", status_code=status.HTTP_201_CREATED, response_model=Dict[str, str])
@@ -39,11 +36,11 @@ def register_user(
     """
     # Get client IP for security logging
     client_ip = request.client.host if request else "unknown"
-    application_logger.info(f"Registration attempt: [{user_data.email}] from IP [{client_ip}]")
+    application_logger.info("Registration attempt: [%s] from IP [%s]", user_data.email, client_ip)
     
     # Check for existing email - early return pattern
     if user_data.email in user_database:
-        application_logger.warning(f"Registration failed - email already exists: [{user_data.email}]")
+        application_logger.warning("Registration failed - email already exists: [%s]", user_data.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Email already registered"
@@ -53,21 +50,28 @@ def register_user(
     password_hash = hash_password(user_data.password)
     
     # Create user record with password hash included directly
-    user_database[user_data.email] = User(
+    new_user = User(
         email=user_data.email, 
         username=user_data.username,
         passhash=password_hash,
         subscriptions=[]
     )
+    user_database[user_data.email] = new_user
     
-    # Persist user data to disk
-    save_data_to_file()
+    # Append the new user to the mutation log, undoing the registration if that fails
+    if not log_mutation({"op": "register", "email": new_user.email, "user": new_user.model_dump(mode="json")}):
+        user_database.pop(user_data.email, None)
+        application_logger.error("Registration rolled back - mutation log write failed: [%s]", user_data.email)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to save the registration, please try again"
+        )
     
-    application_logger.info(f"User registered successfully: [{user_data.email}], username: [{user_data.username}]")
+    application_logger.info("User registered successfully: [%s], username: [%s]", user_data.email, user_data.username)
     return {"message": "Registration successful"}
 
 @router.post("/login", response_model=Dict[str, Any])
-def login_user(
+async def login_user(
     credentials: LoginRequest = Body(..., description="User login credentials"),
     request: Request = None
 ) -> Dict[str, Any]:
@@ -78,14 +82,18 @@ def login_user(
     Implements single-session policy by invalidating any existing user sessions.
     
     Returns an access token and user information on successful authentication.
+    
+    Declared async since the password check is a single SHA-256 digest and
+    everything else is dict operations, so the threadpool hop would cost
+    more than the work itself.
     """
     # Get client IP for security logging
     client_ip = request.client.host if request else "unknown"
-    application_logger.info(f"Login attempt: [{credentials.email}] from IP [{client_ip}]")
+    application_logger.info("Login attempt: [%s] from IP [%s]", credentials.email, client_ip)
     
     # Verify user exists - early return pattern
     if credentials.email not in user_database:
-        application_logger.warning(f"Login failed - user not found: [{credentials.email}]")
+        application_logger.warning("Login failed - user not found: [%s]", credentials.email)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="User not found"
@@ -96,34 +104,29 @@ def login_user(
     
     # Validate password in a single check with proper error reporting
     if not hasattr(user, "passhash") or not user.passhash:
-        application_logger.warning(f"Login failed - no password hash: [{credentials.email}]")
+        application_logger.warning("Login failed - no password hash: [%s]", credentials.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="Password not set for account"
         )
     
     if not verify_password(credentials.password, user.passhash):
-        application_logger.warning(f"Login failed - incorrect password: [{credentials.email}]")
+        application_logger.warning("Login failed - incorrect password: [%s]", credentials.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="Incorrect password"
         )
     
     # Single-session policy: Invalidate existing sessions for this user
-    # Optimized to use direct lookup instead of iterating through all sessions
-    if credentials.email in email_to_token_map:
-        existing_token = email_to_token_map[credentials.email]
-        if existing_token in active_sessions:
-            del active_sessions[existing_token]
-            application_logger.info(f"Invalidated previous session for user: [{credentials.email}]")
-    
-    # Create new session token with expiration
-    session_token, token_expiration_time = create_access_token(credentials.email)
+    # Uses the email-to-token index instead of iterating through all sessions
+    existing_token = email_to_token.pop(credentials.email, None)
+    if existing_token is not None and discard_session(existing_token) is not None:
+        application_logger.info("Invalidated previous session for user: [%s]", credentials.email)
     
-    # Update email-to-token mapping for faster lookups
-    email_to_token_map[credentials.email] = session_token
+    # Create new session token with expiration (also updates the email-to-token index)
+    session_token, token_expiration_time = create_access_token(credentials.email)
     
-    application_logger.info(f"Login successful: [{credentials.email}], token valid for [1 hour]")
+    application_logger.info("Login successful: [%s], token valid for [1 hour]", credentials.email)
     
     # Return authentication details
     return {
@@ -135,7 +138,7 @@ def login_user(
     }
 
 @router.post("/logout", response_model=Dict[str, str])
-def logout_user(
+async def logout_user(
     current_user: User = Depends(get_current_user), 
     auth_token: str = Depends(oauth2_scheme)
 ) -> Dict[str, str]:
@@ -144,25 +147,19 @@ def logout_user(
     
     Invalidates the current authentication token, effectively logging out the user.
     If the token is already invalid, returns a message indicating the user was already logged out.
+    Declared async since it only removes the session from memory.
     
     Returns a success message on successful logout.
     """
-    # Get session data for the token
-    session_data = active_sessions.get(auth_token)
+    # Remove the session together with its email-to-token index entry
+    session_data = discard_session(auth_token)
     
-    if auth_token in active_sessions:
+    if session_data is not None:
         # Get user email for logging
         user_email = get_user_email_from_session(session_data)
         
-        # Remove the session
-        del active_sessions[auth_token]
-        
-        # Update our lookup map
-        if user_email in email_to_token_map and email_to_token_map[user_email] == auth_token:
-            del email_to_token_map[user_email]
-        
-        application_logger.info(f"User logged out: [{user_email}]")
+        application_logger.info("User logged out: [%s]", user_email)
         return {"message": "Logout successful"}
     
-    application_logger.warning(f"Logout attempted with invalid token")
+    application_logger.warning("Logout attempted with invalid token")
     return {"message": "Already logged out"}
\ No newline at end of file
@@ -7,17 +7,21 @@ This module provides API endpoints for:
 - Updating existing subscription details
 - Deleting specific subscriptions by name
 """
-from fastapi import APIRouter, Body, HTTPException, Depends, status
+from fastapi import APIRouter, Body, HTTPException, Depends, Response, status
 from typing import List, Dict, Any, Optional, Tuple
+from pydantic import TypeAdapter
 
 from src.app.models.subscription import Subscription
 from src.app.models.user import User
 from src.app.core.security import get_current_user
-from src.app.db.storage import save_data_to_file
+from src.app.db.storage import log_mutation
 from src.app.core.logging import application_logger
 
 router = APIRouter(tags=["Subscriptions"])
 
+# Serializes a whole subscription list to JSON bytes in one pydantic-core call
+subscription_list_adapter = TypeAdapter(List[Subscription])
+
 def find_subscription_by_name(user: User, service_name: str) -> Tuple[int, Optional[Subscription]]:
     """
     Find a subscription by name with case-insensitive matching
@@ -29,11 +33,7 @@ def find_subscription_by_name(user: User, service_name: str) -> Tuple[int, Optio
     Returns:
         Tuple containing (index, subscription) if found, or (-1, None) if not found
     """
-    service_name_lower = service_name.lower()
-    for i, sub in enumerate(user.subscriptions):
-        if sub.service_name.lower() == service_name_lower:
-            return i, sub
-    return -1, None
+    return user.find_subscription(service_name)
 
 def check_duplicate_subscription(user: User, service_name: str, exclude_index: int = -1) -> bool:
     """
@@ -47,11 +47,28 @@ def check_duplicate_subscription(user: User, service_name: str, exclude_index: i
     Returns:
         True if duplicate exists, False otherwise
     """
-    service_name_lower = service_name.lower()
-    for i, sub in enumerate(user.subscriptions):
-        if i != exclude_index and sub.service_name.lower() == service_name_lower:
-            return True
-    return False
+    index, _ = user.find_subscription(service_name)
+    return index != -1 and index != exclude_index
+
+def persistence_failed(user: User, operation: str) -> HTTPException:
+    """
+    Build the error returned when a change could not be written to the log
+    
+    Callers undo the in-memory change before raising it, so the client is
+    never told a change succeeded when it would be lost in a crash.
+    
+    Args:
+        user: User whose change was rolled back
+        operation: Short description of the change for the log
+        
+    Returns:
+        HTTP 500 exception to raise
+    """
+    application_logger.error("User [%s] %s rolled back: mutation log write failed", user.email, operation)
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail="Failed to save the change, please try again"
+    )
 
 @router.post("", status_code=status.HTTP_201_CREATED, response_model=Dict[str, str])
 def add_subscription(
@@ -67,41 +84,114 @@ def add_subscription(
     Returns a success message and the name of the added service.
     """
     application_logger.info(
-        f"User [{current_user.email}] adding subscription: [{new_subscription.service_name}] "
-        f"(${new_subscription.monthly_price:.2f}/month, category: [{new_subscription.category}])"
+        "User [%s] adding subscription: [%s] "
+        "($%.2f/month, category: [%s])",
+        current_user.email, new_subscription.service_name, new_subscription.monthly_price, new_subscription.category
     )
     
-    # Check for duplicate subscription using helper function
-    if check_duplicate_subscription(current_user, new_subscription.service_name):
-        application_logger.warning(
-            f"User [{current_user.email}] attempted to add duplicate subscription: [{new_subscription.service_name}]"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT, 
-            detail="Subscription already exists"
-        )
-    
-    # Add subscription to user's list
-    current_user.subscriptions.append(new_subscription)
-    save_data_to_file()
-    
-    application_logger.info(f"User [{current_user.email}] successfully added subscription: [{new_subscription.service_name}]")
-    return {
-        "message": "Subscription added", 
-        "service": new_subscription.service_name
-    }
+    # Hold the user lock from the lookup through the change and its log record
+    with current_user.lock:
+        # Check for duplicate subscription using helper function
+        if check_duplicate_subscription(current_user, new_subscription.service_name):
+            application_logger.warning(
+                "User [%s] attempted to add duplicate subscription: [%s]", current_user.email, new_subscription.service_name
+            )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, 
+                detail="Subscription already exists"
+            )
+        
+        # Add subscription to user's list
+        current_user.add_subscription(new_subscription)
+        if not log_mutation({
+            "op": "add_subscription",
+            "email": current_user.email,
+            "subscription": new_subscription.model_dump(mode="json")
+        }):
+            current_user.remove_subscription(len(current_user.subscriptions) - 1)
+            raise persistence_failed(current_user, "add")
+        
+        application_logger.info("User [%s] successfully added subscription: [%s]", current_user.email, new_subscription.service_name)
+        return {
+            "message": "Subscription added", 
+            "service": new_subscription.service_name
+        }
+
+@router.post("/bulk", status_code=status.HTTP_201_CREATED, response_model=Dict[str, Any])
+def add_subscriptions_bulk(
+    new_subscriptions: List[Subscription] = Body(..., description="Subscriptions to add in one request"),
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Add several subscriptions for the current user at once
+    
+    The whole batch is rejected if any name already exists for the user
+    or appears twice in the batch (case-insensitive matching), so either
+    all subscriptions are added or none are.
+    
+    The batch is written to the mutation log as a single record, paying
+    for one append and one fsync instead of one per subscription.
+    
+    Returns a success message and the names of the added services.
+    """
+    application_logger.info("User [%s] adding [%s] subscriptions in bulk", current_user.email, len(new_subscriptions))
+    
+    # Hold the user lock from the lookup through the change and its log record
+    with current_user.lock:
+        # Check against existing subscriptions and within the batch itself
+        batch_names = set()
+        for new_subscription in new_subscriptions:
+            name_key = new_subscription.service_name_lc
+            if name_key in batch_names or check_duplicate_subscription(current_user, new_subscription.service_name):
+                application_logger.warning(
+                    "User [%s] bulk add rejected, duplicate subscription: [%s]", current_user.email, new_subscription.service_name
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Subscription '{new_subscription.service_name}' already exists"
+                )
+            batch_names.add(name_key)
+        
+        for new_subscription in new_subscriptions:
+            current_user.add_subscription(new_subscription)
+        
+        if new_subscriptions and not log_mutation({
+            "op": "add_subscriptions",
+            "email": current_user.email,
+            "subscriptions": subscription_list_adapter.dump_python(new_subscriptions, mode="json")
+        }):
+            # The batch was appended last, so undo it from the end
+            for _ in new_subscriptions:
+                current_user.remove_subscription(len(current_user.subscriptions) - 1)
+            raise persistence_failed(current_user, "bulk add")
+        
+        added_services = [new_subscription.service_name for new_subscription in new_subscriptions]
+        application_logger.info("User [%s] successfully added [%s] subscriptions in bulk", current_user.email, len(added_services))
+        return {
+            "message": "Subscriptions added",
+            "services": added_services
+        }
 
 @router.get("", response_model=List[Subscription])
-def list_subscriptions(current_user: User = Depends(get_current_user)) -> List[Subscription]:
+async def list_subscriptions(current_user: User = Depends(get_current_user)) -> Response:
     """
     Get all subscriptions for the current user
     
     Returns a list of all subscription objects for the authenticated user.
     Returns an empty list if the user has no subscriptions.
+    
+    Declared async since it does no blocking I/O (logging only enqueues),
+    which avoids the threadpool hop. The JSON body is rendered once and
+    reused until the subscriptions change.
     """
     subscription_count = len(current_user.subscriptions)
-    application_logger.info(f"User [{current_user.email}] viewed their [{subscription_count}] subscriptions")
-    return current_user.subscriptions
+    application_logger.info("User [%s] viewed their [%s] subscriptions", current_user.email, subscription_count)
+    
+    body = current_user.cached_analytics(
+        "subscription_list_json",
+        lambda: subscription_list_adapter.dump_json(current_user.subscriptions)
+    )
+    return Response(content=body, media_type="application/json")
 
 @router.put("/{service_name}", response_model=Dict[str, str])
 def update_subscription(
@@ -118,7 +208,7 @@ def update_subscription(
     
     Returns a success message indicating the subscription was updated.
     """
-    application_logger.info(f"User [{current_user.email}] updating subscription: [{service_name}]")
+    application_logger.info("User [%s] updating subscription: [%s]", current_user.email, service_name)
     
     # Validate category if provided - centralized validation
     if "category" in updated_subscription:
@@ -128,61 +218,69 @@ def update_subscription(
                 detail="Category must be a string"
             )
         elif not updated_subscription["category"].strip():
-            application_logger.warning(f"User [{current_user.email}] attempted to update subscription with empty category")
+            application_logger.warning("User [%s] attempted to update subscription with empty category", current_user.email)
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail="Category cannot be empty"
             )
     
-    # Find the subscription using helper function
-    index, existing_subscription = find_subscription_by_name(current_user, service_name)
-    
-    # If subscription not found
-    if existing_subscription is None:
-        application_logger.warning(f"User [{current_user.email}] attempted to update non-existent subscription: [{service_name}]")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Subscription [{service_name}] not found for current user"
-        )
-    
-    # Check for name conflicts if name is being updated
-    if "service_name" in updated_subscription:
-        new_name = updated_subscription["service_name"]
-        if new_name.lower() != service_name.lower() and check_duplicate_subscription(current_user, new_name):
+    # Hold the user lock from the lookup through the change and its log record
+    with current_user.lock:
+        # Find the subscription using helper function
+        index, existing_subscription = find_subscription_by_name(current_user, service_name)
+        
+        # If subscription not found
+        if existing_subscription is None:
+            application_logger.warning("User [%s] attempted to update non-existent subscription: [%s]", current_user.email, service_name)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Subscription [{service_name}] not found for current user"
+            )
+        
+        # Merge the changes and validate them in a single step using model methods
+        updated_data = existing_subscription.model_dump()
+        updated_data.update(updated_subscription)
+        
+        try:
+            # Create and validate updated subscription object
+            validated_subscription = Subscription(**updated_data)
+        except ValueError as e:
+            # Handle validation errors from Pydantic
+            application_logger.warning("User [%s] update validation failed: %s", current_user.email, e)
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=str(e)
+            )
+        
+        # Check for name conflicts on the validated (stripped) name
+        if check_duplicate_subscription(current_user, validated_subscription.service_name, exclude_index=index):
             application_logger.warning(
-                f"User [{current_user.email}] attempted to update subscription to existing name: [{new_name}]"
+                "User [%s] attempted to update subscription to existing name: [%s]",
+                current_user.email, validated_subscription.service_name
             )
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail=f"Subscription with name '{new_name}' already exists"
+                detail=f"Subscription with name '{validated_subscription.service_name}' already exists"
             )
-    
-    # Update and validate in a single step using model methods
-    updated_data = existing_subscription.model_dump()
-    updated_data.update(updated_subscription)
-    
-    try:
-        # Create and validate updated subscription object
-        validated_subscription = Subscription(**updated_data)
         
         # Update the subscription
-        current_user.subscriptions[index] = validated_subscription
+        current_user.replace_subscription(index, validated_subscription)
         
-        # Save changes
-        save_data_to_file()
+        # Append the change to the mutation log
+        if not log_mutation({
+            "op": "update_subscription",
+            "email": current_user.email,
+            "service_name": existing_subscription.service_name,
+            "subscription": validated_subscription.model_dump(mode="json")
+        }):
+            current_user.replace_subscription(index, existing_subscription)
+            raise persistence_failed(current_user, "update")
         
-        application_logger.info(f"User [{current_user.email}] successfully updated subscription: [{service_name}]")
+        application_logger.info("User [%s] successfully updated subscription: [%s]", current_user.email, service_name)
         return {
             "message": f"Subscription {service_name} updated successfully",
             "service": validated_subscription.service_name
         }
-    except ValueError as e:
-        # Handle validation errors from Pydantic
-        application_logger.warning(f"User [{current_user.email}] update validation failed: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=str(e)
-        )
 
 @router.delete("/{service_name}", response_model=Dict[str, str])
 def delete_subscription(
@@ -197,25 +295,29 @@ def delete_subscription(
     
     Returns a success message indicating the subscription was deleted.
     """
-    # Find the subscription first to provide better error messages
-    index, subscription = find_subscription_by_name(current_user, service_name)
-    
-    if subscription is None:
-        application_logger.warning(f"User [{current_user.email}] attempted to delete non-existent subscription: [{service_name}]")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail=f"Subscription [{service_name}] not found for current user"
-        )
-    
-    # More efficient deletion when we already know the index
-    exact_name = subscription.service_name  # Preserve exact case for response
-    current_user.subscriptions.pop(index)
-    
-    # Save changes and return success message
-    save_data_to_file()
-    application_logger.info(f"User [{current_user.email}] deleted subscription: [{exact_name}]")
-    
-    return {
-        "message": f"Subscription {exact_name} deleted successfully",
-        "service": exact_name
-    }
\ No newline at end of file
+    # Hold the user lock from the lookup through the change and its log record
+    with current_user.lock:
+        # Find the subscription first to provide better error messages
+        index, subscription = find_subscription_by_name(current_user, service_name)
+        
+        if subscription is None:
+            application_logger.warning("User [%s] attempted to delete non-existent subscription: [%s]", current_user.email, service_name)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, 
+                detail=f"Subscription [{service_name}] not found for current user"
+            )
+        
+        # Remove in place by index; only later name index entries are shifted
+        exact_name = subscription.service_name  # Preserve exact case for response
+        current_user.remove_subscription(index)
+        
+        # Log the deletion and return success message
+        if not log_mutation({"op": "delete_subscription", "email": current_user.email, "service_name": exact_name}):
+            current_user.insert_subscription(index, subscription)
+            raise persistence_failed(current_user, "delete")
+        application_logger.info("User [%s] deleted subscription: [%s]", current_user.email, exact_name)
+        
+        return {
+            "message": f"Subscription {exact_name} deleted successfully",
+            "service": exact_name
+        }
\ No newline at end of file
@@ -6,12 +6,15 @@ This module provides:
 - Health check endpoint for monitoring
 - System status information
 """
-from fastapi import APIRouter, status, Response
-from typing import Dict, Any
+import hashlib
+import json
+from fastapi import APIRouter, status, Request, Response
+from typing import Dict, Any, Tuple
 from functools import lru_cache
 
 from src.app.config import app_settings
 from src.app.core.logging import application_logger
+from src.app.api.analytics import etag_matches
 
 # Create router with appropriate tag
 router = APIRouter(tags=["System"])
@@ -31,25 +34,40 @@ def get_api_info() -> Dict[str, Any]:
         "status": "healthy"
     }
 
-@router.get("/", status_code=status.HTTP_200_OK)
-def get_root_info(response: Response) -> Dict[str, Any]:
+@lru_cache(maxsize=1)
+def get_api_info_body() -> Tuple[bytes, str]:
+    """
+    Render the API information once as JSON bytes with a matching ETag
+    
+    Returns:
+        Tuple containing (JSON body, quoted ETag)
+    """
+    body = json.dumps(get_api_info(), separators=(",", ":")).encode()
+    return body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+@router.get("/", status_code=status.HTTP_200_OK, response_model=Dict[str, Any])
+async def get_root_info(request: Request) -> Response:
     """
     Root endpoint providing basic API information
     
     This is the landing page for the API that provides general information
-    about the system including version and status.
+    about the system including version and status. The body is rendered
+    once, so requests only compare ETags and copy the cached bytes.
     
     Returns:
-        Dictionary with API information
+        JSON response with API information, or 304 if the client's copy is current
     """
-    # Add cache headers to allow browsers to cache this response
-    response.headers["Cache-Control"] = "public, max-age=60"
-    
     application_logger.debug("Root endpoint accessed")
-    return get_api_info()
+    body, etag = get_api_info_body()
+    
+    # Add cache headers to allow browsers to cache this response
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=60"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.get("/health", status_code=status.HTTP_200_OK)
-def health_check() -> Dict[str, str]:
+async def health_check() -> Dict[str, str]:
     """
     Health check endpoint for monitoring
     
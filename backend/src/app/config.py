@@ -13,5 +13,8 @@ class Settings:
     
     BASE_DIR = Path(__file__).resolve().parent.parent
     DATA_FILEPATH = os.path.join(BASE_DIR, "data", "subhub_data.json")
+    SAVE_THROTTLE_SECONDS = 1.0  # Minimum delay between background snapshots of logged changes
+    SESSION_SWEEP_SECONDS = 60.0  # Delay between background sweeps of expired sessions
+    PROFILE_REQUESTS = os.environ.get("SUBHUB_PROFILE") == "1"  # Write a pyinstrument report per request
 
 app_settings = Settings()
\ No newline at end of file
@@ -4,55 +4,113 @@ Logging configuration for SubHub API
 This module provides a complete logging setup with:
 - CSV-formatted logs for easy analysis
 - Both file and console output
-- Timestamp splitting for better data processing
+- Separate date and time columns for better data processing
+- Queue-based handlers so formatting and I/O happen off the request thread
 - Automatic log directory creation
 """
 import os
 import time
+import atexit
 import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-import sys
 from datetime import datetime
 
+# Background listener that drains queued records into the real handlers
+_log_listener = None
+
+# Longest time a buffered record waits before it is written to the log file
+LOG_FLUSH_INTERVAL_SECONDS = 1.0
+
+class DeferredFormatQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread
+    
+    The base QueueHandler formats every record in the calling thread so
+    it can be pickled. This queue never leaves the process, so records
+    are enqueued as-is and the listener's handlers do all the formatting.
+    """
+    
+    def prepare(self, record):
+        return record
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    File handler that leaves batching of writes to the file buffer
+    
+    The standard handler flushes after every record, costing a write
+    syscall each. Here the file buffer is flushed when it fills, for
+    warnings and errors, when the handler is flushed or closed at
+    shutdown, and at most flush_interval seconds after any other record,
+    so quiet periods never hold lines back for long.
+    """
+    
+    def __init__(self, *args, flush_interval: float = LOG_FLUSH_INTERVAL_SECONDS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.flush_interval = flush_interval
+        # Pending timed flush, started by the first record left in the buffer
+        self._flush_timer = None
+    
+    def emit(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.WARNING:
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self._timed_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        except Exception:
+            self.handleError(record)
+    
+    def _timed_flush(self):
+        """Write out buffered records once the flush interval has passed"""
+        with self.lock:
+            self._flush_timer = None
+            self.flush()
+    
+    def close(self):
+        with self.lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        super().close()
+
 class CSVLogFormatter(logging.Formatter):
     """
     Custom formatter that creates CSV-structured log entries
     
     Features:
-    - Splits timestamps into separate date and time columns
+    - Emits date and time as separate columns via the date format
     - Properly escapes message content for CSV compatibility
     - Adds application name for multi-application environments
+    - Renders the timestamp at most once per second
     """
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Second of the last formatted record and its rendered timestamp
+        self._cached_second = None
+        self._cached_timestamp = ""
+    
     def format(self, record):
-        # Format timestamp according to specified date format
-        timestamp = self.formatTime(record, self.datefmt)
-        
-        # Split timestamp into date and time components
-        timestamp_parts = timestamp.split()
-        
-        try:
-            # Normal case - timestamp format is "YYYY-MM-DD HH:MM:SS"
-            if len(timestamp_parts) == 2:
-                log_date = timestamp_parts[0]  # YYYY-MM-DD
-                log_time = timestamp_parts[1]  # HH:MM:SS
-            else:
-                # Fall back to current time if format is unexpected
-                current_time = datetime.now()
-                log_date = current_time.strftime("%Y-%m-%d")
-                log_time = current_time.strftime("%H:%M:%S")
-                
-        except Exception as e:
-            # Ultimate fallback with clear error indicators
-            log_date = "ERROR_DATE"
-            log_time = "ERROR_TIME"
-            print(f"ERROR: Timestamp formatting failed: {e}", file=sys.stderr)
+        # The date format contains the column separator, e.g. "%Y-%m-%d,%H:%M:%S"
+        # Records are formatted on the listener thread only, so the cache needs no lock
+        record_second = int(record.created)
+        if record_second != self._cached_second:
+            self._cached_timestamp = self.formatTime(record, self.datefmt)
+            self._cached_second = record_second
+        timestamp = self._cached_timestamp
         
         # Escape message content for CSV compatibility
         message = record.getMessage().replace('"', '""')
             
         # Return properly formatted CSV log entry
-        return f'{log_date},{log_time},{record.levelname},{record.name},"{message}"'
+        return f'{timestamp},{record.levelname},{record.name},"{message}"'
 
 def setup_logging(log_level=logging.INFO):
     """
@@ -86,11 +144,14 @@ def setup_logging(log_level=logging.INFO):
     root_logger.setLevel(log_level)
     
     # Clear any existing handlers (important for module reloads)
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
     
-    # Create file handler for persistent logs
-    file_handler = logging.FileHandler(log_file_path, mode='a')
+    # Create file handler for persistent logs (buffered, see BufferedFileHandler)
+    file_handler = BufferedFileHandler(log_file_path, mode='a')
     file_handler.setLevel(log_level)
     
     # Create console handler for development visibility
@@ -98,19 +159,29 @@ def setup_logging(log_level=logging.INFO):
     console_handler.setLevel(log_level)
     
     # Apply custom CSV formatter to both handlers
-    csv_formatter = CSVLogFormatter(datefmt='%Y-%m-%d %H:%M:%S')
+    csv_formatter = CSVLogFormatter(datefmt='%Y-%m-%d,%H:%M:%S')
     file_handler.setFormatter(csv_formatter)
     console_handler.setFormatter(csv_formatter)
     
-    # Add handlers to root logger
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    # Callers only enqueue records; a listener thread formats and writes them
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(DeferredFormatQueueHandler(log_queue))
+    _log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _log_listener.start()
     
     # Create application-specific logger
     app_logger = logging.getLogger("subhub")
-    app_logger.info(f"SubHub application started (log file: {log_file_path})")
+    app_logger.info("SubHub application started (log file: %s)", log_file_path)
     
     return app_logger, log_file_path
 
+def stop_logging() -> None:
+    """Flush queued log records and stop the background listener"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
 # Create logger instance for application-wide use
-application_logger, log_file_path = setup_logging()
\ No newline at end of file
+application_logger, log_file_path = setup_logging()
+atexit.register(stop_logging)
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+Request profiling for SubHub API
+
+This module provides:
+- An ASGI middleware that profiles each HTTP request with pyinstrument
+- HTML reports written next to the application logs
+
+The middleware is only installed when SUBHUB_PROFILE=1 is set, and
+pyinstrument is an optional development tool that is not installed
+with the application.
+"""
+import asyncio
+import itertools
+import time
+from pathlib import Path
+
+from src.app.core.logging import application_logger
+
+# pyinstrument is optional: profiling is skipped when it is not installed
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+# Reports go to a folder inside the logs directory
+PROFILES_DIRECTORY = Path(__file__).parent.parent.parent / "logs" / "profiles"
+
+# Distinguishes reports of requests finishing in the same nanosecond
+_report_counter = itertools.count()
+
+class ProfilerMiddleware:
+    """
+    Pure ASGI middleware writing a pyinstrument report for every HTTP request
+
+    Async mode follows the request's own task across awaits, so time
+    spent on other concurrent requests is not attributed to it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        if Profiler is None:
+            application_logger.warning("Request profiling requested but pyinstrument is not installed")
+        else:
+            PROFILES_DIRECTORY.mkdir(parents=True, exist_ok=True)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or Profiler is None:
+            await self.app(scope, receive, send)
+            return
+
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+
+            # One report per request, named by time and a counter only so the
+            # client-controlled path never ends up in a filename
+            report_path = PROFILES_DIRECTORY / f"{time.time_ns()}_{next(_report_counter)}.html"
+            # Rendering the report is CPU-heavy too, so it runs in the thread as well
+            await asyncio.to_thread(lambda: report_path.write_text(profiler.output_html()))
+            application_logger.debug(
+                "Wrote profile of [%s %s] to %s", scope["method"], scope["path"], report_path
+            )
@@ -8,14 +8,17 @@ This module provides:
 - Token expiration handling
 """
 import hashlib
+import hmac
 import secrets
 import time
-from typing import Tuple, Dict, Any, Union, Optional
+from typing import Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
-from src.app.db.storage import user_database, active_sessions
+from src.app.db.storage import (
+    user_database, active_sessions, register_session, discard_session, SessionRecord
+)
 from src.app.models.user import User
 from src.app.core.logging import application_logger
 
@@ -47,7 +50,7 @@ def hash_password(plain_password: str) -> str:
     
     # Handle case where a boolean is passed (from validation functions)
     if isinstance(plain_password, bool):
-        application_logger.warning(f"Received boolean value in hash_password function: {plain_password}")
+        application_logger.warning("Received boolean value in hash_password function: %s", plain_password)
         # Return a fixed hash for booleans to prevent errors
         # This is not secure and should only be used in tests
         return hashlib.sha256("boolean_value".encode()).hexdigest()
@@ -68,21 +71,23 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         
     Returns:
         True if password matches, False otherwise
+        
+    Note:
+        Only login calls this; authenticated requests are resolved from
+        active_sessions by get_current_user and never hash a password.
     """
     try:
         calculated_hash = hash_password(plain_password)
-        return calculated_hash == hashed_password
+        # Constant-time comparison so response timing does not leak the hash
+        return hmac.compare_digest(calculated_hash, hashed_password)
     except Exception as e:
         # Log any unexpected errors but still return False
-        application_logger.warning(f"Password verification error: {str(e)}")
+        application_logger.warning("Password verification error: %s", e)
         return False
 
-def get_user_email_from_session(session_data: Union[str, Dict[str, Any]]) -> str:
+def get_user_email_from_session(session_data: SessionRecord) -> str:
     """
-    Extract user email from session data regardless of storage format
-    
-    Handles both new format (dictionary with email and expiration)
-    and legacy format (string containing just email)
+    Extract user email from session data
     
     Args:
         session_data: Session data from active_sessions dictionary
@@ -90,14 +95,16 @@ def get_user_email_from_session(session_data: Union[str, Dict[str, Any]]) -> str
     Returns:
         User's email address
     """
-    return session_data["email"] if isinstance(session_data, dict) else session_data
+    return session_data.email
 
-def get_current_user(auth_token: str = Depends(oauth2_scheme)) -> User:
+async def get_current_user(auth_token: str = Depends(oauth2_scheme)) -> User:
     """
     Authenticate and return the current user based on their token
     
     This function is designed to be used as a FastAPI dependency
-    in endpoints that require authentication.
+    in endpoints that require authentication. It only performs dict
+    lookups, so it runs directly on the event loop instead of being
+    dispatched to the threadpool.
     
     Args:
         auth_token: JWT token from Authorization header
@@ -108,48 +115,41 @@ def get_current_user(auth_token: str = Depends(oauth2_scheme)) -> User:
     Raises:
         HTTPException 401: If token is invalid, expired, or user not found
     """
-    # Check if token exists in active sessions
-    if auth_token not in active_sessions:
-        application_logger.warning(f"Authentication failed: Invalid token [{auth_token[:5]}...]")
+    # Look up the session in a single dict operation
+    session_data = active_sessions.get(auth_token)
+    if session_data is None:
+        application_logger.warning("Authentication failed: Invalid token [%s...]", auth_token[:5])
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="Invalid or expired token",
             headers={"WWW-Authenticate": "Bearer"}
         )
     
-    # Get session data
-    session_data = active_sessions[auth_token]
-    
-    # Handle token expiration
-    if isinstance(session_data, dict) and "expires" in session_data:
-        current_time = time.time()
-        expiration_time = session_data["expires"]
+    # Handle token expiration (sessions are never persisted, so every
+    # session was created by create_access_token and carries an expiry)
+    current_time = time.time()
+    if current_time > session_data.expires:
+        # Token has expired, remove it from active sessions
+        discard_session(auth_token)
+        
+        # Calculate how long ago it expired
+        expired_seconds_ago = int(current_time - session_data.expires)
         
-        if current_time > expiration_time:
-            # Token has expired, remove it from active sessions
-            del active_sessions[auth_token]
-            
-            # Calculate how long ago it expired
-            expired_seconds_ago = int(current_time - expiration_time)
-            
-            application_logger.warning(
-                f"Authentication failed: Token expired {expired_seconds_ago} seconds ago [{auth_token[:5]}...]"
-            )
-            
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, 
-                detail="Token expired",
-                headers={"WWW-Authenticate": "Bearer"}
-            )
-            
-        user_email = session_data["email"]
-    else:
-        # Legacy format token without expiration
-        user_email = session_data
+        application_logger.warning(
+            "Authentication failed: Token expired %s seconds ago [%s...]",
+            expired_seconds_ago, auth_token[:5]
+        )
         
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, 
+            detail="Token expired",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    
     # Verify user exists in database
-    if user_email not in user_database:
-        application_logger.warning(f"Authentication failed: User not found [{user_email}]")
+    user = user_database.get(session_data.email)
+    if user is None:
+        application_logger.warning("Authentication failed: User not found [%s]", session_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="Account not found",
@@ -157,7 +157,7 @@ def get_current_user(auth_token: str = Depends(oauth2_scheme)) -> User:
         )
     
     # Success - return user object
-    return user_database[user_email]
+    return user
 
 def create_access_token(email: str, expiration_seconds: int = DEFAULT_TOKEN_EXPIRATION) -> Tuple[str, float]:
     """
@@ -176,11 +176,8 @@ def create_access_token(email: str, expiration_seconds: int = DEFAULT_TOKEN_EXPI
     # Calculate expiration timestamp
     token_expiration = time.time() + expiration_seconds
     
-    # Store in active sessions
-    active_sessions[session_token] = {
-        "email": email,
-        "expires": token_expiration
-    }
+    # Store in active sessions and index the token by email
+    register_session(session_token, SessionRecord(email=email, expires=token_expiration))
     
-    application_logger.info(f"Created new token for [{email}], valid for {expiration_seconds} seconds")
+    application_logger.info("Created new token for [%s], valid for %s seconds", email, expiration_seconds)
     return session_token, token_expiration
\ No newline at end of file
@@ -5,30 +5,166 @@ This module provides:
 - In-memory data stores for users and sessions
 - Functions to save application state to disk
 - Functions to load application state from disk
+- An append-only mutation log with periodic compaction into the snapshot
 - Safe operation wrappers with error handling
 """
+import asyncio
 import json
 import os
+import shutil
+import threading
+import time
 import traceback
-from typing import Dict, Any, Callable, TypeVar, Optional
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, Set, Tuple, TypeVar, Optional
 from datetime import date
 from pathlib import Path
 
+from pydantic import ValidationError
+
 from src.app.models.user import User
 from src.app.models.subscription import Subscription
 from src.app.config import app_settings
 from src.app.core.logging import application_logger
 
+# orjson is optional: much faster and serializes dates natively when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Type variable for generic function return types
 T = TypeVar('T')
 
+# Write buffer for snapshots, so streaming users issues few large writes
+SNAPSHOT_WRITE_BUFFER_BYTES = 1024 * 1024
+
 # ===== GLOBAL DATA STORES =====
 
 # Store user objects indexed by email
 user_database: Dict[str, User] = {}
 
+@dataclass(slots=True)
+class SessionRecord:
+    """
+    Active session of a user
+    
+    Slotted instead of a per-session dict, which keeps each stored
+    session to a fixed two-field object.
+    """
+    email: str
+    expires: float
+
 # Store active user sessions indexed by token
-active_sessions: Dict[str, Any] = {}
+active_sessions: Dict[str, SessionRecord] = {}
+
+# Reverse index of each user's current session token, keyed by email
+email_to_token: Dict[str, str] = {}
+
+# Orders conditional updates of the email-to-token index; session reads never lock
+_session_index_lock = threading.Lock()
+
+# Set when the mutation log holds records not yet compacted into the snapshot
+_data_dirty = False
+
+# Serializes log appends against snapshot compaction
+_persistence_lock = threading.Lock()
+
+# Emails of users changed since the last snapshot (beyond their subscriptions)
+_dirty_emails: Set[str] = set()
+
+# Serialized JSON of each user from the last snapshot, with the user object
+# and subscriptions version it was produced from
+_serialized_users: Dict[str, Tuple[User, int, bytes]] = {}
+
+# Descriptor of the mutation log kept open between appends, and its path
+_log_fd: Optional[int] = None
+_log_fd_path: Optional[str] = None
+
+# Group commit of log appends: records written so far, records known to be
+# fsynced, and a lock letting one thread fsync on behalf of those waiting
+_log_appended_count = 0
+_log_synced_count = 0
+_log_sync_lock = threading.Lock()
+
+# Sequence number of the last logged mutation, kept across restarts; each
+# snapshot stores it so replay skips records the snapshot already contains
+_log_sequence = 0
+
+# ===== SESSION OPERATIONS =====
+
+def register_session(session_token: str, session_data: SessionRecord) -> None:
+    """
+    Store a new session and make it the user's indexed token
+    
+    Args:
+        session_token: Token identifying the session
+        session_data: Session details including the user's email
+    """
+    active_sessions[session_token] = session_data
+    with _session_index_lock:
+        email_to_token[session_data.email] = session_token
+
+def discard_session(session_token: str) -> Optional[SessionRecord]:
+    """
+    Remove a session and its email index entry
+    
+    The session is removed with a single atomic pop, so concurrent logouts
+    or expiry checks for the same token cannot both act on it. The index
+    entry is only dropped if it still points at this token, so a newer
+    login for the same user is left intact.
+    
+    Args:
+        session_token: Token of the session to remove
+        
+    Returns:
+        The removed session data, or None if the session did not exist
+    """
+    session_data = active_sessions.pop(session_token, None)
+    if session_data is None:
+        return None
+    
+    email = session_data.email
+    with _session_index_lock:
+        if email_to_token.get(email) == session_token:
+            del email_to_token[email]
+    return session_data
+
+def purge_expired_sessions(current_time: Optional[float] = None) -> int:
+    """
+    Remove every session whose expiration time has passed
+    
+    Expired tokens are also rejected when they are used, but sessions of
+    users who never come back would otherwise stay in memory forever.
+    
+    Args:
+        current_time: Timestamp to compare against (default: now)
+        
+    Returns:
+        Number of sessions removed
+    """
+    if current_time is None:
+        current_time = time.time()
+    
+    expired_tokens = [
+        token for token, session_data in list(active_sessions.items())
+        if session_data.expires < current_time
+    ]
+    return sum(discard_session(token) is not None for token in expired_tokens)
+
+async def run_session_sweeper(sweep_seconds: float = app_settings.SESSION_SWEEP_SECONDS) -> None:
+    """
+    Periodically purge expired sessions until cancelled
+    
+    Args:
+        sweep_seconds: Delay between sweeps
+    """
+    while True:
+        await asyncio.sleep(sweep_seconds)
+        purged_count = purge_expired_sessions()
+        if purged_count:
+            application_logger.info("Purged [%d] expired sessions", purged_count)
 
 # ===== SAFE OPERATION WRAPPER =====
 
@@ -54,10 +190,29 @@ def safe_operation(operation: Callable[..., T], error_message: str, *args, **kwa
     try:
         return operation(*args, **kwargs)
     except Exception as error:
-        application_logger.error(f"{error_message}: {str(error)}")
+        application_logger.error("%s: %s", error_message, error)
         application_logger.debug(traceback.format_exc())
         return None
 
+# ===== SERIALIZATION =====
+
+def dump_json(data: Any) -> bytes:
+    """
+    Serialize data to compact JSON bytes
+    
+    Uses orjson when available and falls back to the standard library.
+    Values JSON cannot represent natively (like dates) are stringified.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=str)
+    return json.dumps(data, default=str, separators=(",", ":")).encode()
+
+def load_json(raw: bytes) -> Any:
+    """Parse JSON bytes with orjson when available"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
 # ===== FILE OPERATIONS =====
 
 def ensure_data_directory_exists() -> bool:
@@ -74,15 +229,98 @@ def ensure_data_directory_exists() -> bool:
         Path(data_dir).mkdir(parents=True, exist_ok=True)
         return True
     except Exception as error:
-        application_logger.error(f"Failed to create data directory: {str(error)}")
+        application_logger.error("Failed to create data directory: %s", error)
         return False
 
+def get_log_filepath() -> str:
+    """Return the path of the append-only mutation log next to the snapshot"""
+    return f"{app_settings.DATA_FILEPATH}.wal"
+
+def get_backup_filepath() -> str:
+    """Return the path of the backup copy of the previous snapshot"""
+    return f"{app_settings.DATA_FILEPATH}.bak"
+
+def backup_data_file() -> bool:
+    """
+    Keep the current snapshot as a backup before it is replaced
+    
+    Snapshots are swapped in with os.replace, which points the data path
+    at a new file. A hard link to the old file therefore preserves it
+    without copying any bytes. Filesystems without hard link support fall
+    back to shutil.copyfile, which uses the kernel's copy fast paths.
+    
+    Returns:
+        True if a backup was made, False if there was nothing to back up
+    """
+    if not os.path.exists(app_settings.DATA_FILEPATH):
+        return False
+    
+    backup_filepath = get_backup_filepath()
+    with suppress(FileNotFoundError):
+        os.unlink(backup_filepath)
+    
+    try:
+        os.link(app_settings.DATA_FILEPATH, backup_filepath)
+    except OSError:
+        shutil.copyfile(app_settings.DATA_FILEPATH, backup_filepath)
+    return True
+
+def sync_directory(directory: str) -> None:
+    """
+    Flush a directory's entries to disk
+    
+    Makes a rename inside the directory durable, so a crash cannot bring
+    back the file that was replaced. Platforms that cannot open
+    directories (Windows) skip this step.
+    
+    Args:
+        directory: Path of the directory to sync
+    """
+    try:
+        directory_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
+
+def serialize_user(email: str, user: User) -> bytes:
+    """
+    Return the JSON bytes of a user, reusing the previous snapshot's copy
+    
+    A cached copy is reused only if it was produced from the same user
+    object at the same subscriptions version and the user has not been
+    marked dirty since, so saves only re-serialize users that changed.
+    
+    Args:
+        email: Email key of the user in user_database
+        user: User object to serialize
+        
+    Returns:
+        Serialized user as JSON bytes
+    """
+    cached = _serialized_users.get(email)
+    if (
+        cached is not None
+        and email not in _dirty_emails
+        and cached[0] is user
+        and cached[1] == user.subscriptions_version
+    ):
+        return cached[2]
+    
+    serialized = dump_json(user.model_dump())
+    _serialized_users[email] = (user, user.subscriptions_version, serialized)
+    return serialized
+
 def save_data_to_file() -> bool:
     """
     Save all application data to disk as JSON
     
     Stores user data with password hashes directly in the user objects.
     Session data is deliberately not persisted for security reasons.
+    The mutation log is truncated afterwards since the snapshot now
+    contains every logged change.
     
     Returns:
         True if save was successful, False otherwise
@@ -92,73 +330,355 @@ def save_data_to_file() -> bool:
         return False
         
     def perform_save():
-        # Prepare data structure for serialization
-        data_to_save = {
-            "users": {email: user.model_dump() for email, user in user_database.items()}
+        # Write to a temporary file first so a crash never leaves a partial file
+        temp_filepath = f"{app_settings.DATA_FILEPATH}.tmp"
+        with open(temp_filepath, "wb", buffering=SNAPSHOT_WRITE_BUFFER_BYTES) as data_file:
+            # Stream each user's JSON into the large buffer instead of joining
+            # the whole snapshot in memory first
             # Note: active sessions are deliberately not saved to disk for security
-        }
+            data_file.write(b'{"log_seq":' + str(_log_sequence).encode() + b',"users":{')
+            separator = b""
+            for email, user in list(user_database.items()):
+                data_file.write(separator + dump_json(email) + b":")
+                data_file.write(serialize_user(email, user))
+                separator = b","
+            data_file.write(b"}}")
+            
+            # Forget users that no longer exist
+            for email in _serialized_users.keys() - user_database.keys():
+                del _serialized_users[email]
+            _dirty_emails.clear()
+            
+            data_file.flush()
+            os.fsync(data_file.fileno())
+        backup_data_file()
+        os.replace(temp_filepath, app_settings.DATA_FILEPATH)
+        
+        # The rename must be durable before the log is emptied, or a crash
+        # could bring back the old snapshot next to an empty log
+        sync_directory(os.path.dirname(app_settings.DATA_FILEPATH) or ".")
         
-        # Write data to file with pretty formatting
-        with open(app_settings.DATA_FILEPATH, "w") as data_file:
-            json.dump(data_to_save, data_file, default=str, indent=2)
+        # Every logged mutation is now part of the snapshot
+        open(get_log_filepath(), "w").close()
             
-        application_logger.info(f"Data successfully saved to {app_settings.DATA_FILEPATH}")
+        application_logger.info("Data successfully saved to %s", app_settings.DATA_FILEPATH)
         return True
     
-    result = safe_operation(perform_save, "Failed to save application data")
+    with _persistence_lock:
+        result = safe_operation(perform_save, "Failed to save application data")
     return result is not None
 
+def get_log_descriptor() -> int:
+    """
+    Return an append-only descriptor for the mutation log
+    
+    The descriptor stays open between appends, so each mutation costs a
+    write and an fsync instead of also opening and closing the file. It
+    is reopened when the data path changes or the log file was removed.
+    Callers must hold _persistence_lock.
+    
+    Returns:
+        File descriptor opened with O_APPEND
+    """
+    global _log_fd, _log_fd_path
+    log_filepath = get_log_filepath()
+    if _log_fd is not None:
+        if _log_fd_path == log_filepath and os.fstat(_log_fd).st_nlink > 0:
+            return _log_fd
+        close_mutation_log()
+    
+    if not ensure_data_directory_exists():
+        raise OSError(f"Data directory for {log_filepath} is unavailable")
+    _log_fd = os.open(log_filepath, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    _log_fd_path = log_filepath
+    return _log_fd
+
+def close_mutation_log() -> None:
+    """Close the mutation log descriptor if it is open"""
+    global _log_fd, _log_fd_path
+    if _log_fd is not None:
+        with suppress(OSError):
+            os.close(_log_fd)
+    _log_fd = None
+    _log_fd_path = None
+
+def sync_mutation_log(log_fd: int, record_number: int) -> bool:
+    """
+    Make sure a log record has reached the disk, sharing fsyncs between threads
+    
+    Only one thread fsyncs at a time. Any records written before it starts
+    are covered by that fsync, so threads queued behind it usually find
+    their record already durable and return without another fsync.
+    Concurrent mutations therefore cost one fsync per batch, not per request.
+    
+    Args:
+        log_fd: Descriptor the record was written to
+        record_number: Sequence number of the record from log_mutation
+        
+    Returns:
+        True once the record is durable, False if the fsync failed
+    """
+    global _log_synced_count
+    with _log_sync_lock:
+        if _log_synced_count >= record_number:
+            return True
+        
+        # Everything counted here was written before this fsync starts
+        covered_count = _log_appended_count
+        try:
+            os.fsync(log_fd)
+        except OSError as error:
+            application_logger.error("Failed to sync mutation log: %s", error)
+            return False
+        _log_synced_count = covered_count
+    return True
+
+def log_mutation(record: Dict[str, Any]) -> bool:
+    """
+    Append a single mutation record to the on-disk log
+    
+    Endpoints call this instead of rewriting the whole snapshot, so each
+    change costs one small append. The call returns once the record is
+    fsynced, but concurrent calls share fsyncs (see sync_mutation_log).
+    Records identify subscriptions by name, which makes replaying them
+    idempotent.
+    
+    Args:
+        record: JSON-serializable mutation with an "op" and "email" key
+        
+    Returns:
+        True if the record was written and synced, False otherwise
+    """
+    global _data_dirty
+    
+    def perform_append():
+        global _log_appended_count, _log_sequence
+        log_fd = get_log_descriptor()
+        sequence = _log_sequence + 1
+        pending = memoryview(dump_json({**record, "seq": sequence}) + b"\n")
+        while pending:
+            pending = pending[os.write(log_fd, pending):]
+        _log_sequence = sequence
+        _log_appended_count += 1
+        return log_fd, _log_appended_count
+    
+    with _persistence_lock:
+        result = safe_operation(perform_append, f"Failed to log [{record.get('op')}] mutation")
+        _data_dirty = True
+        _dirty_emails.add(record["email"])
+    
+    # Wait for durability outside the append lock so other requests can write
+    return result is not None and sync_mutation_log(*result)
+
+def apply_mutation(record: Dict[str, Any]) -> None:
+    """
+    Apply a logged mutation record to the in-memory data stores
+    
+    Records already reflected in memory are skipped, so a record
+    appended while a snapshot was being written can safely be replayed.
+    
+    Args:
+        record: Mutation record previously written by log_mutation
+    """
+    operation = record["op"]
+    email = record["email"]
+    
+    if operation == "register":
+        if email not in user_database:
+            user_database[email] = User(**record["user"])
+        return
+    
+    user = user_database.get(email)
+    if user is None:
+        return
+    
+    if operation == "add_subscription":
+        subscription = Subscription(**record["subscription"])
+        if user.find_subscription(subscription.service_name)[0] == -1:
+            user.add_subscription(subscription)
+    elif operation == "add_subscriptions":
+        for subscription_data in record["subscriptions"]:
+            subscription = Subscription(**subscription_data)
+            if user.find_subscription(subscription.service_name)[0] == -1:
+                user.add_subscription(subscription)
+    elif operation == "update_subscription":
+        index, _ = user.find_subscription(record["service_name"])
+        if index != -1:
+            user.replace_subscription(index, Subscription(**record["subscription"]))
+    elif operation == "delete_subscription":
+        index, _ = user.find_subscription(record["service_name"])
+        if index != -1:
+            user.remove_subscription(index)
+    else:
+        application_logger.warning("Skipping unknown mutation [%s] in log", operation)
+
+def replay_mutation_log(snapshot_sequence: int = 0) -> int:
+    """
+    Replay the mutation log on top of the loaded snapshot
+    
+    Records up to the snapshot's sequence number are already part of it
+    and are skipped, so a log left behind by a crash during compaction is
+    never applied twice. Only an unreadable final line is expected (a
+    record torn by a crash mid-append); any other bad line, or a record
+    that no longer applies, is logged and skipped so the records after it
+    are still replayed.
+    
+    Args:
+        snapshot_sequence: Sequence number stored in the loaded snapshot
+    
+    Returns:
+        Number of records replayed
+    """
+    global _data_dirty, _log_sequence
+    _log_sequence = snapshot_sequence
+    log_filepath = get_log_filepath()
+    if not os.path.exists(log_filepath):
+        return 0
+    
+    with open(log_filepath, "rb") as log_file:
+        lines = log_file.readlines()
+    
+    replayed_count = 0
+    for line_number, line in enumerate(lines, start=1):
+        try:
+            record = load_json(line)
+        except ValueError as error:
+            if line_number == len(lines):
+                application_logger.warning("Ignoring torn record at the end of the mutation log: %s", error)
+            else:
+                application_logger.error("Skipping unreadable mutation log record [%s]: %s", line_number, error)
+            continue
+        
+        # Records written before sequence numbers existed carry none
+        sequence = record.get("seq", 0)
+        if sequence and sequence <= snapshot_sequence:
+            continue
+        
+        try:
+            apply_mutation(record)
+        except Exception as error:
+            application_logger.error("Skipping mutation log record [%s] that failed to apply: %s", line_number, error)
+            continue
+        _log_sequence = max(_log_sequence, sequence)
+        replayed_count += 1
+    
+    if replayed_count:
+        _data_dirty = True
+        application_logger.info("Replayed [%s] records from mutation log", replayed_count)
+    return replayed_count
+
+def flush_pending_save() -> bool:
+    """
+    Compact logged changes into the snapshot if there are any
+    
+    Returns:
+        True if nothing was pending or the save succeeded, False otherwise
+    """
+    global _data_dirty
+    if not _data_dirty:
+        return True
+    
+    _data_dirty = False
+    if save_data_to_file():
+        return True
+    
+    # Keep the data marked so the next cycle retries the save
+    _data_dirty = True
+    return False
+
+async def run_background_writer(throttle_seconds: float = app_settings.SAVE_THROTTLE_SECONDS) -> None:
+    """
+    Compact logged changes into the snapshot at most once per interval
+    
+    Every throttle_seconds, any changes logged since the last snapshot
+    are written out, so a burst of requests costs a single snapshot and
+    the log stays short. Runs until cancelled, then compacts any remaining
+    records so the next startup begins from a fresh snapshot. Every
+    compaction, including the final one, runs in a worker thread to keep
+    JSON serialization and fsync off the event loop.
+    
+    Args:
+        throttle_seconds: Delay between snapshots of pending changes
+    """
+    try:
+        while True:
+            await asyncio.sleep(throttle_seconds)
+            if _data_dirty:
+                await asyncio.to_thread(flush_pending_save)
+    finally:
+        await asyncio.to_thread(flush_pending_save)
+        with _persistence_lock:
+            close_mutation_log()
+
+def repair_subscription_dates(email: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replace unparseable subscription dates with today's date
+    
+    Only used when a stored user fails validation, so well-formed data
+    never pays for per-subscription date checks.
+    
+    Args:
+        email: Email of the user being loaded (for logging)
+        user_data: Raw user data from the data file
+        
+    Returns:
+        The same user data with invalid dates replaced
+    """
+    for subscription in user_data.get("subscriptions", []):
+        starting_date = subscription.get("starting_date")
+        if isinstance(starting_date, str):
+            try:
+                date.fromisoformat(starting_date)
+            except ValueError:
+                application_logger.warning(
+                    "Invalid date format in subscription for user %s, using today's date", email
+                )
+                subscription["starting_date"] = date.today()
+    return user_data
+
 def load_data_from_file() -> bool:
     """
     Load application data from disk if available
     
-    Restores user data from the JSON file with password hashes included in each user object.
+    Restores user data from the JSON file with password hashes included in each user object,
+    then replays any mutations logged since that snapshot was written.
     
     Returns:
         True if load was successful, False if file doesn't exist or load failed
     """
     # Check if data file exists
     if not os.path.exists(app_settings.DATA_FILEPATH):
-        application_logger.info(f"No data file found at {app_settings.DATA_FILEPATH}")
-        return False
+        application_logger.info("No data file found at %s", app_settings.DATA_FILEPATH)
+        return replay_mutation_log() > 0
     
     def perform_load():
-        application_logger.info(f"Loading data from {app_settings.DATA_FILEPATH}")
+        application_logger.info("Loading data from %s", app_settings.DATA_FILEPATH)
         
-        with open(app_settings.DATA_FILEPATH, "r") as data_file:
-            loaded_data = json.load(data_file)
+        with open(app_settings.DATA_FILEPATH, "rb") as data_file:
+            loaded_data = load_json(data_file.read())
             
             # Clear existing data stores
             user_database.clear()
             # Don't clear active sessions - let them remain valid
             
-            # Restore user data with proper date conversion
+            # Restore user data; Pydantic parses ISO date strings natively
             for email, user_data in loaded_data.get("users", {}).items():
-                # Process subscriptions to convert date strings to date objects
-                if "subscriptions" in user_data:
-                    for subscription in user_data["subscriptions"]:
-                        if "starting_date" in subscription and isinstance(subscription["starting_date"], str):
-                            try:
-                                # Convert ISO format string to date object
-                                subscription["starting_date"] = date.fromisoformat(subscription["starting_date"])
-                            except ValueError:
-                                # If conversion fails, use current date as fallback
-                                application_logger.warning(
-                                    f"Invalid date format in subscription for user {email}, using today's date"
-                                )
-                                subscription["starting_date"] = date.today()
-                
-                # Create user object from loaded data
                 try:
                     # Password hash is now stored directly in the user object as 'passhash'
-                    user_database[email] = User(**user_data)
-                except Exception as e:
-                    application_logger.error(f"Failed to load user {email}: {str(e)}")
-                    continue
+                    user_database[email] = User.model_validate(user_data)
+                except ValidationError:
+                    # Slow path: repair invalid subscription dates and retry once
+                    try:
+                        user_database[email] = User.model_validate(repair_subscription_dates(email, user_data))
+                    except Exception as e:
+                        application_logger.error("Failed to load user %s: %s", email, e)
+                        continue
             
             user_count = len(user_database)
-            application_logger.info(f"Successfully loaded {user_count} users from data file")
-            return True
+            application_logger.info("Successfully loaded %s users from data file", user_count)
+            
+        replay_mutation_log(loaded_data.get("log_seq", 0))
+        return True
             
     return safe_operation(perform_load, "Failed to load application data") or False
 
@@ -179,10 +699,11 @@ def store_password_hash(username: str, password_hash: str) -> None:
             if user.username == username:
                 # Store the hash directly in the user object
                 user.passhash = password_hash
-                application_logger.debug(f"Stored password hash for user {username}")
+                _dirty_emails.add(email)
+                application_logger.debug("Stored password hash for user %s", username)
                 return
         
-        application_logger.warning(f"Attempted to store password hash for non-existent user: {username}")
+        application_logger.warning("Attempted to store password hash for non-existent user: %s", username)
     except Exception as e:
-        application_logger.error(f"Failed to store password hash: {str(e)}")
+        application_logger.error("Failed to store password hash: %s", e)
         raise
\ No newline at end of file
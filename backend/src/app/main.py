@@ -8,7 +8,8 @@ This module initializes and configures the SubHub FastAPI application with:
 - Application startup/shutdown lifecycle management
 - Swagger UI and OpenAPI documentation setup
 """
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import traceback
 from typing import List, Dict, Any
 
@@ -20,7 +21,8 @@ from fastapi.exception_handlers import http_exception_handler
 # Application imports
 from src.app.config import app_settings
 from src.app.core.logging import application_logger
-from src.app.db.storage import load_data_from_file
+from src.app.core.profiler import ProfilerMiddleware
+from src.app.db.storage import load_data_from_file, run_background_writer, run_session_sweeper
 from src.app.api import auth, subscriptions, analytics, system
 
 # ===== LIFECYCLE MANAGEMENT =====
@@ -40,10 +42,21 @@ async def application_lifespan(app_instance: FastAPI):
     else:
         application_logger.warning("Application startup: No existing data found or load failed")
     
+    # Persist changes in the background instead of inside each request
+    background_writer = asyncio.create_task(run_background_writer())
+    
+    # Drop expired sessions that are never used again
+    session_sweeper = asyncio.create_task(run_session_sweeper())
+    
     yield  # Application runs during this yield
     
-    # Shutdown: Any cleanup code goes here
+    # Shutdown: Stop the writer, which flushes any unsaved changes
     application_logger.info("Application shutdown: Performing cleanup operations")
+    session_sweeper.cancel()
+    background_writer.cancel()
+    for task in (session_sweeper, background_writer):
+        with suppress(asyncio.CancelledError):
+            await task
 
 # ===== API DOCUMENTATION CONFIG =====
 
@@ -85,10 +98,14 @@ app.add_middleware(
     allow_origins=["http://localhost:3000"],  # Frontend origin - more secure than "*"
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Content-Type", "Authorization", "Accept"],
-    expose_headers=["Content-Type"]
+    allow_headers=["Content-Type", "Authorization", "Accept", "If-None-Match"],
+    expose_headers=["Content-Type", "X-Next-Cursor", "ETag"]
 )
 
+# Profile every request when SUBHUB_PROFILE=1 (added last so it wraps CORS too)
+if app_settings.PROFILE_REQUESTS:
+    app.add_middleware(ProfilerMiddleware)
+
 # ===== EXCEPTION HANDLING =====
 
 @app.exception_handler(Exception)
@@ -105,7 +122,7 @@ async def global_exception_handler(request: Request, exception: Exception):
     
     # Log detailed error information including stack trace
     application_logger.error(
-        f"Unhandled {error_type}: {error_message}"
+        "Unhandled %s: %s", error_type, error_message
     )
     application_logger.debug(traceback.format_exc())
     
@@ -6,8 +6,25 @@ This module provides Pydantic models for:
 - Default values and field constraints
 """
 from datetime import date
-from typing import List, Optional
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+from functools import lru_cache
+from typing import Any, List, Optional
+from pydantic import BaseModel, Field, field_validator, ConfigDict, PrivateAttr
+
+@lru_cache(maxsize=256)
+def normalize_category(category: str) -> str:
+    """
+    Normalize a category name, reusing results for repeated values
+    
+    Categories have low cardinality, so the cache also makes every
+    subscription in a category share one string object.
+    
+    Args:
+        category: Raw category name (already checked to be non-blank)
+        
+    Returns:
+        Stripped and capitalized category name
+    """
+    return category.strip().capitalize()
 
 class Subscription(BaseModel):
     """
@@ -24,6 +41,25 @@ class Subscription(BaseModel):
     category: str = Field(..., description="Category of the subscription (e.g., Entertainment, Productivity)")
     starting_date: Optional[date] = Field(default_factory=date.today, description="Date when the subscription started")
     
+    # Lowercased copies for case-insensitive lookups, computed once on creation
+    _service_name_lc: str = PrivateAttr(default="")
+    _category_lc: str = PrivateAttr(default="")
+    
+    def model_post_init(self, __context: Any) -> None:
+        """Precompute lowercased name and category after validation"""
+        self._service_name_lc = self.service_name.lower()
+        self._category_lc = self.category.lower()
+    
+    @property
+    def service_name_lc(self) -> str:
+        """Lowercased service name for case-insensitive matching"""
+        return self._service_name_lc
+    
+    @property
+    def category_lc(self) -> str:
+        """Lowercased category for case-insensitive matching"""
+        return self._category_lc
+    
     @field_validator('monthly_price')
     @classmethod
     def validate_price(cls, v):
@@ -40,7 +76,7 @@ class Subscription(BaseModel):
             raise ValueError("Category cannot be empty")
         
         # Basic normalization of category names
-        return v.strip().capitalize()
+        return normalize_category(v)
     
     @field_validator("service_name")
     @classmethod
@@ -50,7 +86,10 @@ class Subscription(BaseModel):
             raise ValueError("Service name cannot be empty")
         return v.strip()
     
+    # Immutable so the derived data on User (name index, category groups,
+    # price array) can never drift; changes replace the whole object
     model_config = ConfigDict(
+        frozen=True,
         json_schema_extra={
             "example": {
                 "service_name": "Netflix",
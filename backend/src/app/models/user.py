@@ -6,8 +6,12 @@ This module provides Pydantic models for:
 - Request and response schemas for authentication endpoints
 - Field constraints and validations
 """
-from typing import List, Optional
-from pydantic import BaseModel, Field, EmailStr, field_validator, ConfigDict
+import math
+import threading
+from array import array
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field, EmailStr, field_validator, ConfigDict, PrivateAttr
 
 from src.app.models.subscription import Subscription
 from src.app.utils.validation_utils import validate_password_strength
@@ -28,6 +32,27 @@ class User(BaseModel):
     email: EmailStr = Field(..., description="User's email address (used for login)")
     subscriptions: List[Subscription] = Field(default_factory=list, description="User's subscription services")
     
+    # Analytics results and rendered views derived from the subscription list,
+    # each with the subscriptions version it was built from (never persisted)
+    _analytics_cache: Dict[str, Tuple[int, Any]] = PrivateAttr(default_factory=dict)
+    
+    # Contiguous copy of subscription prices for fast aggregation
+    _prices_cache: Optional[array] = PrivateAttr(default=None)
+    
+    # Incremented on every subscription change (used for ETags)
+    _subscriptions_version: int = PrivateAttr(default=0)
+    
+    # List position of each subscription keyed by lowercased service name
+    _name_index: Optional[Dict[str, int]] = PrivateAttr(default=None)
+    
+    # Subscriptions and total spending per category, maintained on every change
+    _category_index: Optional[Dict[str, Dict[str, Any]]] = PrivateAttr(default=None)
+    
+    # Guards the subscription list and every index derived from it, since
+    # sync endpoints run concurrently in the threadpool (reentrant so the
+    # endpoints can hold it across a find, check and change)
+    _lock: threading.RLock = PrivateAttr(default_factory=threading.RLock)
+    
     @field_validator('username')
     @classmethod
     def validate_username(cls, v):
@@ -36,6 +61,227 @@ class User(BaseModel):
             raise ValueError('Username cannot be empty')
         return v.strip()
     
+    def cached_analytics(self, key: str, builder: Callable[[], Any]) -> Any:
+        """
+        Return a cached analytics result, building it on first access
+        
+        Results are tagged with the subscriptions version read before the
+        build started. A result whose build overlapped a change therefore
+        carries an old version and is never served from the cache, even if
+        it is stored after the change cleared the cache.
+        
+        Args:
+            key: Name of the analytics view (e.g. "summary")
+            builder: Function computing the result from the subscriptions
+            
+        Returns:
+            The cached or freshly built result
+        """
+        version = self._subscriptions_version
+        cached = self._analytics_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        result = builder()
+        self._analytics_cache[key] = (version, result)
+        return result
+    
+    def monthly_prices(self) -> array:
+        """
+        Return the monthly prices of all subscriptions as a packed array
+        
+        The array of C doubles is built once and then kept in step with
+        add/replace/remove_subscription, so aggregations avoid per-object
+        attribute lookups and changes never rebuild it.
+        
+        Returns:
+            Array of monthly prices in subscription order
+        """
+        with self._lock:
+            if self._prices_cache is None:
+                self._prices_cache = array("d", (sub.monthly_price for sub in self.subscriptions))
+            return self._prices_cache
+    
+    @property
+    def lock(self) -> threading.RLock:
+        """Lock to hold across a lookup and the change that depends on it"""
+        return self._lock
+    
+    @property
+    def subscriptions_version(self) -> int:
+        """Counter identifying the current state of the subscription list"""
+        return self._subscriptions_version
+    
+    def _get_name_index(self) -> Dict[str, int]:
+        """Return the name index, building it from the list if needed"""
+        with self._lock:
+            if self._name_index is None:
+                self._name_index = {
+                    sub.service_name_lc: position for position, sub in enumerate(self.subscriptions)
+                }
+            return self._name_index
+    
+    def category_groups(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return subscriptions grouped by category with their total cost
+        
+        The grouping is built once from the subscription list and then
+        updated incrementally by add/replace/remove_subscription, so
+        reading it costs one entry per category rather than a full scan.
+        
+        Returns:
+            Mapping of category to {"subscriptions": [...], "total_cost": float}
+        """
+        with self._lock:
+            if self._category_index is None:
+                self._category_index = {}
+                for sub in self.subscriptions:
+                    self._category_index.setdefault(
+                        sub.category, {"subscriptions": [], "total_cost": 0.0}
+                    )["subscriptions"].append(sub)
+                for category in self._category_index:
+                    self._refresh_category_total(category)
+            return self._category_index
+    
+    def _refresh_category_total(self, category: str) -> None:
+        """Recompute one category's total from its members (avoids float drift)"""
+        group = self._category_index[category]
+        group["total_cost"] = math.fsum(map(attrgetter("monthly_price"), group["subscriptions"]))
+    
+    @staticmethod
+    def _member_position(members: List[Subscription], subscription: Subscription) -> int:
+        """Find a subscription in a category group by identity rather than field equality"""
+        return next(i for i, member in enumerate(members) if member is subscription)
+    
+    def _index_category_add(self, subscription: Subscription) -> None:
+        """Add a subscription to its category group"""
+        if self._category_index is None:
+            return
+        self._category_index.setdefault(
+            subscription.category, {"subscriptions": [], "total_cost": 0.0}
+        )["subscriptions"].append(subscription)
+        self._refresh_category_total(subscription.category)
+    
+    def _index_category_remove(self, subscription: Subscription) -> None:
+        """Remove a subscription from its category group, dropping empty groups"""
+        if self._category_index is None:
+            return
+        members = self._category_index[subscription.category]["subscriptions"]
+        del members[self._member_position(members, subscription)]
+        if members:
+            self._refresh_category_total(subscription.category)
+        else:
+            del self._category_index[subscription.category]
+    
+    def find_subscription(self, service_name: str) -> Tuple[int, Optional[Subscription]]:
+        """
+        Find a subscription by name with case-insensitive matching
+        
+        Args:
+            service_name: Name of service to find
+            
+        Returns:
+            Tuple containing (index, subscription) if found, or (-1, None) if not found
+        """
+        with self._lock:
+            position = self._get_name_index().get(service_name.lower(), -1)
+            if position == -1:
+                return -1, None
+            return position, self.subscriptions[position]
+    
+    def add_subscription(self, subscription: Subscription) -> None:
+        """Append a subscription and index it by name"""
+        with self._lock:
+            self.subscriptions.append(subscription)
+            if self._name_index is not None:
+                self._name_index[subscription.service_name_lc] = len(self.subscriptions) - 1
+            if self._prices_cache is not None:
+                self._prices_cache.append(subscription.monthly_price)
+            self._index_category_add(subscription)
+            self._invalidate_aggregates()
+    
+    def replace_subscription(self, position: int, subscription: Subscription) -> None:
+        """
+        Replace the subscription at a list position, re-indexing its name
+        
+        Args:
+            position: List position of the subscription to replace
+            subscription: New subscription for that position
+            
+        Raises:
+            ValueError: If another subscription already uses the new name
+        """
+        with self._lock:
+            if self._get_name_index().get(subscription.service_name_lc, position) != position:
+                raise ValueError(f"Subscription with name '{subscription.service_name}' already exists")
+            
+            previous = self.subscriptions[position]
+            self.subscriptions[position] = subscription
+            if self._name_index is not None:
+                del self._name_index[previous.service_name_lc]
+                self._name_index[subscription.service_name_lc] = position
+            if self._prices_cache is not None:
+                self._prices_cache[position] = subscription.monthly_price
+            if self._category_index is not None:
+                if previous.category == subscription.category:
+                    # Keep the member's place within its category
+                    members = self._category_index[previous.category]["subscriptions"]
+                    members[self._member_position(members, previous)] = subscription
+                    self._refresh_category_total(previous.category)
+                else:
+                    self._index_category_remove(previous)
+                    self._index_category_add(subscription)
+            self._invalidate_aggregates()
+    
+    def remove_subscription(self, position: int) -> Subscription:
+        """
+        Remove the subscription at a list position in place
+        
+        Only the index entries of subscriptions after the removed one
+        are shifted; the rest of the index is kept.
+        
+        Args:
+            position: List position of the subscription to remove
+            
+        Returns:
+            The removed subscription
+        """
+        with self._lock:
+            removed = self.subscriptions.pop(position)
+            if self._name_index is not None:
+                del self._name_index[removed.service_name_lc]
+                for shifted in range(position, len(self.subscriptions)):
+                    self._name_index[self.subscriptions[shifted].service_name_lc] = shifted
+            if self._prices_cache is not None:
+                self._prices_cache.pop(position)
+            self._index_category_remove(removed)
+            self._invalidate_aggregates()
+            return removed
+    
+    def insert_subscription(self, position: int, subscription: Subscription) -> None:
+        """
+        Put a subscription back at a list position
+        
+        Used to undo a removal that could not be persisted. The derived
+        indexes are rebuilt on next use rather than shifted in place,
+        which keeps category members in list order.
+        
+        Args:
+            position: List position to insert at
+            subscription: Subscription to insert
+        """
+        with self._lock:
+            self.subscriptions.insert(position, subscription)
+            self._name_index = None
+            self._prices_cache = None
+            self._category_index = None
+            self._invalidate_aggregates()
+    
+    def _invalidate_aggregates(self) -> None:
+        """Drop cached aggregates that depend on the subscription values"""
+        self._analytics_cache.clear()
+        self._subscriptions_version += 1
+    
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
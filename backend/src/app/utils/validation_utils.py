@@ -6,6 +6,12 @@ from typing import Optional
 
 from src.app.config import app_settings
 
+# Patterns compiled once at import instead of looked up on every call
+UPPERCASE_PATTERN = re.compile(r'[A-Z]')
+LOWERCASE_PATTERN = re.compile(r'[a-z]')
+DIGIT_PATTERN = re.compile(r'\d')
+SERVICE_NAME_PATTERN = re.compile(r'^[\w\s\-\+\&\.\,\!\?\(\)\'\"]+$')
+
 def validate_password_strength(password: str) -> str:
     """
     Validate password meets strength requirements
@@ -28,13 +34,13 @@ def validate_password_strength(password: str) -> str:
     if len(password) < app_settings.MIN_PASSWORD_LENGTH:
         raise ValueError(f"Password must be at least {app_settings.MIN_PASSWORD_LENGTH} characters")
         
-    if not re.search(r'[A-Z]', password):
+    if not UPPERCASE_PATTERN.search(password):
         raise ValueError("Password must contain at least one uppercase letter")
         
-    if not re.search(r'[a-z]', password):
+    if not LOWERCASE_PATTERN.search(password):
         raise ValueError("Password must contain at least one lowercase letter")
         
-    if not re.search(r'\d', password):
+    if not DIGIT_PATTERN.search(password):
         raise ValueError("Password must contain at least one digit")
         
     # Return the original password, not a boolean
@@ -63,5 +69,4 @@ def is_valid_service_name(service_name: str) -> bool:
         return False
         
     # Check for valid characters (allowing alphanumeric, spaces, and basic punctuation)
-    valid_pattern = r'^[\w\s\-\+\&\.\,\!\?\(\)\'\"]+$'
-    return bool(re.match(valid_pattern, service_name))
\ No newline at end of file
+    return bool(SERVICE_NAME_PATTERN.match(service_name))
\ No newline at end of file
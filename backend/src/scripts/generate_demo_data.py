@@ -103,7 +103,7 @@ def create_demo_users(clear_existing=False):
     for user_info in DEMO_USERS:
         email = user_info["email"]
         if not clear_existing and email in user_database:
-            application_logger.info(f"User [{email}] already exists, skipping...")
+            application_logger.info("User [%s] already exists, skipping...", email)
             continue
         subscriptions = get_random_subscriptions()
         user_database[email] = User(
@@ -122,7 +122,7 @@ def create_demo_users(clear_existing=False):
                 f"Category: [{sub.category}] | Start: [{sub.starting_date}]"
             )
     save_data_to_file()
-    application_logger.info(f"Demo data generation complete. Created/updated [{len(DEMO_USERS)}] users.")
+    application_logger.info("Demo data generation complete. Created/updated [%s] users.", len(DEMO_USERS))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generate demo data for SubHub')
@@ -135,6 +135,6 @@ if __name__ == "__main__":
         for user in DEMO_USERS:
             print(f"  Email: {user['email']}, Password: {user['password']}")
     except Exception as e:
-        application_logger.error(f"Error generating demo data: {e}")
+        application_logger.error("Error generating demo data: %s", e)
         print(f"Error generating demo data: {e}")
         sys.exit(1)
\ No newline at end of file
@@ -8,12 +8,13 @@ This module provides pytest fixtures for:
 """
 import os
 import pytest
+from typing import Dict
 from fastapi.testclient import TestClient
 import tempfile
 
 # FIX: Use src.app instead of app to match your application imports
 from src.app.main import app
-from src.app.db.storage import user_database, active_sessions, save_data_to_file
+from src.app.db.storage import user_database, active_sessions, email_to_token, save_data_to_file
 from src.app.config import app_settings as settings
 from src.app.core.security import verify_password, hash_password, create_access_token
 from src.app.models.user import User
@@ -25,6 +26,25 @@ TEST_USER = {
     "password": "!Testpass123"
 }
 
+# Hashed once instead of for every authenticated test
+TEST_USER_PASSWORD_HASH = hash_password(TEST_USER["password"])
+
+def seed_user(email: str, username: str, password_hash: str) -> Dict[str, str]:
+    """
+    Store a user with a hashed password and an active session token
+    
+    Returns:
+        Authorization headers carrying the new session token
+    """
+    user_database[email] = User(
+        email=email,
+        username=username,
+        passhash=password_hash,
+        subscriptions=[]
+    )
+    token, _ = create_access_token(email)
+    return {"Authorization": f"Bearer {token}"}
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_environment():
     """
@@ -43,50 +63,65 @@ def setup_test_environment():
     
     yield  # Run all tests
     
-    # Clean up after tests complete
-    if os.path.exists(test_data_path):
-        os.unlink(test_data_path)
+    # Clean up after tests complete, including the mutation log and backup
+    for path in (test_data_path, f"{test_data_path}.wal", f"{test_data_path}.bak"):
+        if os.path.exists(path):
+            os.unlink(path)
         
     # Restore original settings
     settings.DATA_FILEPATH = original_data_path
 
+@pytest.fixture(scope="session")
+def shared_clients():
+    """
+    Create the TestClient instances once for the whole test session
+    
+    Returns a plain client and a separate one for authenticated tests,
+    so auth headers never leak into tests using the plain client.
+    """
+    return TestClient(app), TestClient(app)
+
 @pytest.fixture
-def client():
+def client(shared_clients):
     """
-    Create a FastAPI TestClient with a clean database for each test
+    Return a FastAPI TestClient with a clean database for each test
     """
     # Clear all databases before each test
     user_database.clear()
     active_sessions.clear()
+    email_to_token.clear()
     
-    return TestClient(app)
+    return shared_clients[0]
 
 @pytest.fixture
-def authenticated_client():
+def authenticated_client(shared_clients):
     """
-    Create a FastAPI TestClient with a pre-authenticated test user
+    Return a FastAPI TestClient with a pre-authenticated test user
     """
     # Clear all databases before each test
     user_database.clear()
     active_sessions.clear()
+    email_to_token.clear()
     
-    # Create test user with password hash directly in the user object
-    password_hash = hash_password(TEST_USER["password"])
-    user_database[TEST_USER["email"]] = User(
-        email=TEST_USER["email"],
-        username=TEST_USER["username"],
-        passhash=password_hash,
-        subscriptions=[]
-    )
+    # Reuse the shared client with this test's auth headers
+    client = shared_clients[1]
+    client.headers = seed_user(TEST_USER["email"], TEST_USER["username"], TEST_USER_PASSWORD_HASH)
     
-    # Create authentication token
-    token, _ = create_access_token(TEST_USER["email"])
+    return client
+
+@pytest.fixture
+def seeded_user():
+    """
+    Return a function that adds a logged-in user straight to the stores
     
-    # Create test client with auth headers
-    client = TestClient(app)
-    client.headers = {"Authorization": f"Bearer {token}"}
+    For tests that need several accounts but are not testing registration
+    or login, avoiding the HTTP round-trips to /register and /login.
+    Call it as seeded_user(email, username, password) to get auth headers.
+    """
+    def seed(email: str, username: str, password: str) -> Dict[str, str]:
+        return seed_user(email, username, hash_password(password))
     
-    return client
+    return seed
 
 @pytest.fixture
 def test_user():
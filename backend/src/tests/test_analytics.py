@@ -11,6 +11,10 @@ import pytest
 from datetime import date
 import time
 
+from src.app.api.analytics import encode_search_cursor
+from src.app.models.subscription import Subscription
+from src.app.models.user import User
+
 # Import test fixtures
 from .conftest import client, authenticated_client, test_user
 
@@ -62,6 +66,7 @@ def test_category_analysis(authenticated_client):
     - Cost totals per category are calculated accurately
     - Subscription counts per category are accurate
     - Percentage calculations are correct
+    - Categories are sorted by highest spending first
     """
     # Add subscriptions in different categories
     authenticated_client.post("/subscriptions", json=TEST_SUBSCRIPTION)
@@ -99,6 +104,86 @@ def test_category_analysis(authenticated_client):
     for category, data in categories.items():
         expected_pct = (data["total_cost"] / total_cost) * 100
         assert abs(data["percentage"] - expected_pct) < 0.1  # Allow small rounding differences
+    
+    # Categories are ordered by highest spending, not by first appearance
+    authenticated_client.post("/subscriptions", json={
+        "service_name": "Adobe", "monthly_price": 59.99, "category": "Productivity"
+    })
+    categories = authenticated_client.get("/analytics/categories").json()
+    assert list(categories) == ["Productivity", "Entertainment", "Music"]
+
+def test_analytics_cache_invalidation(authenticated_client):
+    """
+    Test that cached analytics are refreshed after subscription changes
+    
+    Verifies that:
+    - Summary reflects subscriptions added after a previous view
+    - Categories reflect updates and deletions after a previous view
+    """
+    authenticated_client.post("/subscriptions", json=TEST_SUBSCRIPTION)
+    assert authenticated_client.get("/analytics/summary").json()["subscription_count"] == 1
+    assert "Entertainment" in authenticated_client.get("/analytics/categories").json()
+    
+    authenticated_client.post("/subscriptions", json=SECOND_SUBSCRIPTION)
+    summary = authenticated_client.get("/analytics/summary").json()
+    assert summary["subscription_count"] == 2
+    assert summary["total_monthly_cost"] == pytest.approx(25.98)
+    
+    authenticated_client.put("/subscriptions/Netflix", json={"category": "Streaming", "monthly_price": 19.99})
+    categories = authenticated_client.get("/analytics/categories").json()
+    assert "Entertainment" not in categories
+    assert "Streaming" in categories
+    assert authenticated_client.get("/analytics/summary").json()["total_monthly_cost"] == pytest.approx(29.98)
+    
+    authenticated_client.delete("/subscriptions/Netflix")
+    assert "Streaming" not in authenticated_client.get("/analytics/categories").json()
+    summary = authenticated_client.get("/analytics/summary").json()
+    assert summary["subscription_count"] == 1
+    assert summary["total_monthly_cost"] == pytest.approx(9.99)
+
+def test_analytics_etag(authenticated_client):
+    """
+    Test conditional requests on analytics endpoints
+    
+    Verifies that:
+    - Summary and categories responses carry an ETag
+    - A matching If-None-Match returns 304 with no body
+    - The ETag changes after the subscriptions change
+    """
+    authenticated_client.post("/subscriptions", json=TEST_SUBSCRIPTION)
+    
+    for path in ("/analytics/summary", "/analytics/categories"):
+        response = authenticated_client.get(path)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        
+        response = authenticated_client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        
+        authenticated_client.post("/subscriptions", json={**SECOND_SUBSCRIPTION, "service_name": path})
+        response = authenticated_client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+def test_analytics_cache_ignores_results_built_during_a_change():
+    """
+    Test that a result built while the subscriptions changed is not reused
+    
+    Verifies that:
+    - A result stored after a concurrent change is rebuilt on the next read
+    """
+    user = User(username="cached", passhash="x" * 64, email="cached@example.com")
+    user.add_subscription(Subscription(**TEST_SUBSCRIPTION))
+    
+    def build_then_change():
+        total = sum(user.monthly_prices())
+        # A threadpool mutation lands before the reader stores its result
+        user.add_subscription(Subscription(**{**TEST_SUBSCRIPTION, "service_name": "Hulu", "monthly_price": 5.0}))
+        return total
+    
+    assert user.cached_analytics("total", build_then_change) == 15.99
+    assert user.cached_analytics("total", lambda: sum(user.monthly_prices())) == 15.99 + 5.0
 
 def test_search_functionality(authenticated_client):
     """
@@ -137,6 +222,103 @@ def test_search_functionality(authenticated_client):
     assert response.status_code == 200
     assert len(response.json()) == 0
 
+def test_search_pagination(authenticated_client):
+    """
+    Test cursor pagination on the search endpoint
+    
+    Verifies that:
+    - Limit caps the number of returned matches
+    - The next cursor is exposed while more matches remain
+    - Following the cursor returns the remaining matches
+    - The last page carries no cursor
+    """
+    for i in range(5):
+        authenticated_client.post("/subscriptions", json={
+            "service_name": f"Service{i}",
+            "monthly_price": 4.99,
+            "category": "Test"
+        })
+    authenticated_client.post("/subscriptions", json=SECOND_SUBSCRIPTION)
+    
+    response = authenticated_client.get("/analytics/search?term=service&limit=2")
+    assert response.status_code == 200
+    assert [s["service_name"] for s in response.json()] == ["Service0", "Service1"]
+    cursor = response.headers["X-Next-Cursor"]
+    
+    response = authenticated_client.get(f"/analytics/search?term=service&limit=2&cursor={cursor}")
+    assert response.status_code == 200
+    assert [s["service_name"] for s in response.json()] == ["Service2", "Service3"]
+    cursor = response.headers["X-Next-Cursor"]
+    
+    response = authenticated_client.get(f"/analytics/search?term=service&limit=2&cursor={cursor}")
+    assert response.status_code == 200
+    assert [s["service_name"] for s in response.json()] == ["Service4"]
+    assert "X-Next-Cursor" not in response.headers
+    
+    # Pagination also applies when no search term is given
+    response = authenticated_client.get(f"/analytics/search?cursor={encode_search_cursor('service4')}")
+    assert response.status_code == 200
+    assert [s["service_name"] for s in response.json()] == ["Spotify"]
+
+def test_search_pagination_survives_deletes(authenticated_client):
+    """
+    Test that search cursors stay valid while subscriptions change
+    
+    Verifies that:
+    - Deleting an already returned subscription does not skip a match
+    - A cursor naming a deleted subscription is rejected
+    """
+    for i in range(4):
+        authenticated_client.post("/subscriptions", json={
+            "service_name": f"Service{i}",
+            "monthly_price": 4.99,
+            "category": "Test"
+        })
+    
+    response = authenticated_client.get("/analytics/search?term=service&limit=2")
+    assert [s["service_name"] for s in response.json()] == ["Service0", "Service1"]
+    cursor = response.headers["X-Next-Cursor"]
+    
+    # Shift every later subscription down by one position
+    authenticated_client.delete("/subscriptions/Service0")
+    
+    response = authenticated_client.get(f"/analytics/search?term=service&limit=2&cursor={cursor}")
+    assert response.status_code == 200
+    assert [s["service_name"] for s in response.json()] == ["Service2", "Service3"]
+    
+    # The cursor's own subscription is gone
+    authenticated_client.delete("/subscriptions/Service1")
+    response = authenticated_client.get(f"/analytics/search?term=service&limit=2&cursor={cursor}")
+    assert response.status_code == 400
+
+def test_search_pagination_with_non_ascii_names(authenticated_client):
+    """
+    Test cursor pagination over names that are not latin-1 encodable
+    
+    Verifies that:
+    - The next cursor can be sent as a header for any service name
+    - Following it resumes after that subscription
+    - A malformed cursor is rejected
+    """
+    for name in ("Яндекс Музыка", "网易云音乐"):
+        authenticated_client.post("/subscriptions", json={
+            "service_name": name,
+            "monthly_price": 4.99,
+            "category": "Music"
+        })
+    
+    response = authenticated_client.get("/analytics/search?limit=1")
+    assert response.status_code == 200
+    assert [s["service_name"] for s in response.json()] == ["Яндекс Музыка"]
+    cursor = response.headers["X-Next-Cursor"]
+    
+    response = authenticated_client.get("/analytics/search", params={"limit": 1, "cursor": cursor})
+    assert response.status_code == 200
+    assert [s["service_name"] for s in response.json()] == ["网易云音乐"]
+    
+    response = authenticated_client.get("/analytics/search", params={"cursor": "not*base64"})
+    assert response.status_code == 400
+
 def test_performance_with_many_subscriptions(authenticated_client):
     """
     Test performance with a large number of subscriptions
@@ -7,12 +7,23 @@ This module verifies that:
 - The application handles potentially malicious input safely
 - Data persistence mechanisms function properly
 """
+import asyncio
+import json
+import os
 import pytest
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
 from datetime import date
 
-from src.app.db.storage import user_database, active_sessions, save_data_to_file, load_data_from_file
+from src.app.db import storage
+from src.app.db.storage import (
+    user_database, active_sessions, save_data_to_file, load_data_from_file, flush_pending_save,
+    get_log_filepath, log_mutation
+)
 from src.app.core.security import verify_password
+from src.app.config import app_settings
 
 # Test subscription data
 TEST_SUBSCRIPTION = {
@@ -100,7 +111,7 @@ def test_xss_injection_attempt(authenticated_client):
     assert response.status_code == 200
     assert len(response.json()) == 1
 
-def test_data_persistence(client, test_user):
+def test_data_persistence(client, test_user, seeded_user):
     """
     Test data persistence mechanism
     
@@ -109,14 +120,8 @@ def test_data_persistence(client, test_user):
     - Data can be reloaded from disk
     - User and subscription information is preserved accurately
     """
-    # Register a user and add subscriptions using the client fixture
-    client.post("/register", json=test_user)
-    login_response = client.post("/login", json={
-        "email": test_user["email"], 
-        "password": test_user["password"]
-    })
-    token = login_response.json()["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
+    # Start from a logged-in user and add subscriptions using the client fixture
+    headers = seeded_user(test_user["email"], test_user["username"], test_user["password"])
     
     # Add a subscription
     client.post("/subscriptions", json=TEST_SUBSCRIPTION, headers=headers)
@@ -135,23 +140,322 @@ def test_data_persistence(client, test_user):
     assert test_user["email"] in user_database
     assert len(user_database[test_user["email"]].subscriptions) == 1
 
-def test_malformed_data_handling(client, test_user):
+def test_snapshot_backup(client, test_user):
     """
-    Test handling of malformed input data
+    Test the backup kept when a snapshot is replaced
     
     Verifies that:
-    - Non-JSON request bodies are rejected properly
-    - Malformed JSON is handled gracefully
-    - Empty request bodies don't crash the server
+    - Saving over an existing snapshot keeps the previous one as a backup
+    - The backup still holds the old data after the new snapshot is written
+    """
+    from src.app.config import app_settings
+    
+    user_database.clear()
+    save_data_to_file()
+    
+    client.post("/register", json=test_user)
+    save_data_to_file()
+    
+    with open(f"{app_settings.DATA_FILEPATH}.bak") as backup_file:
+        assert json.load(backup_file)["users"] == {}
+    with open(app_settings.DATA_FILEPATH) as data_file:
+        assert test_user["email"] in json.load(data_file)["users"]
+
+def test_load_repairs_invalid_dates(test_user):
+    """
+    Test loading stored data with an invalid subscription date
+    
+    Verifies that:
+    - A bad date does not prevent the user from loading
+    - The bad date is replaced with today's date
+    """
+    from src.app.config import app_settings
+    from src.app.core.security import hash_password
+    
+    stored_user = {
+        "username": test_user["username"],
+        "passhash": hash_password(test_user["password"]),
+        "email": test_user["email"],
+        "subscriptions": [{**TEST_SUBSCRIPTION, "starting_date": "not-a-date"}]
+    }
+    with open(app_settings.DATA_FILEPATH, "w") as data_file:
+        json.dump({"users": {test_user["email"]: stored_user}}, data_file)
+    
+    user_database.clear()
+    assert load_data_from_file()
+    assert user_database[test_user["email"]].subscriptions[0].starting_date == date.today()
+
+def test_mutation_log_replay(client, test_user):
+    """
+    Test the append-only mutation log
+    
+    Verifies that:
+    - Endpoint changes are recovered from the log without a snapshot save
+    - Compacting the log into the snapshot preserves the same data
     """
-    # Register a user for authentication
+    # Start from a snapshot with an empty database and an empty log
+    user_database.clear()
+    save_data_to_file()
+    
     client.post("/register", json=test_user)
     login_response = client.post("/login", json={
         "email": test_user["email"],
         "password": test_user["password"]
     })
-    token = login_response.json()["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    client.post("/subscriptions", json=TEST_SUBSCRIPTION, headers=headers)
+    client.post("/subscriptions", json={**TEST_SUBSCRIPTION, "service_name": "Hulu"}, headers=headers)
+    client.put("/subscriptions/Netflix", json={"monthly_price": 19.99}, headers=headers)
+    client.delete("/subscriptions/Hulu", headers=headers)
+    client.post("/subscriptions/bulk", json=[{**TEST_SUBSCRIPTION, "service_name": "Disney+"}], headers=headers)
+    
+    # Recover purely from the snapshot plus the log
+    user_database.clear()
+    load_data_from_file()
+    
+    subscriptions = user_database[test_user["email"]].subscriptions
+    assert [sub.service_name for sub in subscriptions] == ["Netflix", "Disney+"]
+    assert subscriptions[0].monthly_price == 19.99
+    
+    # Compaction folds the log into the snapshot
+    assert flush_pending_save()
+    user_database.clear()
+    load_data_from_file()
+    assert user_database[test_user["email"]].subscriptions[0].monthly_price == 19.99
+    
+    # Appends reopen the log if it was removed behind the open descriptor
+    os.remove(get_log_filepath())
+    client.post("/subscriptions", json={**TEST_SUBSCRIPTION, "service_name": "Max"}, headers=headers)
+    user_database.clear()
+    load_data_from_file()
+    assert [sub.service_name for sub in user_database[test_user["email"]].subscriptions] == ["Netflix", "Disney+", "Max"]
+
+def test_replay_skips_records_already_in_snapshot(client, test_user, seeded_user):
+    """
+    Test replaying a log that was not truncated after its snapshot
+    
+    Verifies that:
+    - Records covered by the snapshot are not applied a second time
+    - Later records are still replayed
+    - A record that no longer applies does not stop the replay
+    """
+    headers = seeded_user(test_user["email"], test_user["username"], test_user["password"])
+    save_data_to_file()
+    client.post("/subscriptions", json=TEST_SUBSCRIPTION, headers=headers)
+    client.put("/subscriptions/Netflix", json={"service_name": "Max"}, headers=headers)
+    client.post("/subscriptions", json=TEST_SUBSCRIPTION, headers=headers)
+    
+    # Simulate a crash between the snapshot swap and the log truncation
+    with open(get_log_filepath(), "rb") as log_file:
+        stale_log = log_file.read()
+    assert flush_pending_save()
+    client.post("/subscriptions", json={**TEST_SUBSCRIPTION, "service_name": "Hulu"}, headers=headers)
+    with open(get_log_filepath(), "rb") as log_file:
+        new_records = log_file.read()
+    with open(get_log_filepath(), "wb") as log_file:
+        log_file.write(stale_log + new_records)
+    
+    user_database.clear()
+    load_data_from_file()
+    names = [sub.service_name for sub in user_database[test_user["email"]].subscriptions]
+    assert names == ["Max", "Netflix", "Hulu"]
+    
+    # Without sequence numbers the rename conflicts with the snapshot, but the
+    # record after it still applies and only the torn last line is dropped
+    rename_record = {
+        "op": "update_subscription",
+        "email": test_user["email"],
+        "service_name": "Netflix",
+        "subscription": {**TEST_SUBSCRIPTION, "service_name": "Max"}
+    }
+    add_record = {
+        "op": "add_subscription",
+        "email": test_user["email"],
+        "subscription": {**TEST_SUBSCRIPTION, "service_name": "Disney+"}
+    }
+    with open(get_log_filepath(), "w") as log_file:
+        log_file.write(json.dumps(rename_record) + "\n" + json.dumps(add_record) + "\n" + '{"op": "add_sub')
+    
+    user_database.clear()
+    load_data_from_file()
+    names = [sub.service_name for sub in user_database[test_user["email"]].subscriptions]
+    assert names == ["Max", "Netflix", "Disney+"]
+
+def test_snapshot_rename_synced_before_log_truncation(client, test_user, seeded_user, monkeypatch):
+    """
+    Test the ordering of a snapshot swap and the mutation log truncation
+    
+    Verifies that:
+    - The data directory is synced after the new snapshot is in place
+    - The log still holds its records at that point
+    """
+    headers = seeded_user(test_user["email"], test_user["username"], test_user["password"])
+    client.post("/subscriptions", json=TEST_SUBSCRIPTION, headers=headers)
+    
+    observed = []
+    original_sync_directory = storage.sync_directory
+    def recording_sync_directory(directory):
+        with open(app_settings.DATA_FILEPATH, "rb") as data_file:
+            snapshot_has_change = b"Netflix" in data_file.read()
+        observed.append((snapshot_has_change, os.path.getsize(get_log_filepath())))
+        original_sync_directory(directory)
+    monkeypatch.setattr(storage, "sync_directory", recording_sync_directory)
+    
+    assert flush_pending_save()
+    assert len(observed) == 1
+    snapshot_has_change, log_size = observed[0]
+    assert snapshot_has_change and log_size > 0
+    assert os.path.getsize(get_log_filepath()) == 0
+
+def test_background_writer_snapshots_pending_changes(client, test_user, seeded_user):
+    """
+    Test the background writer's throttled snapshots
+    
+    Verifies that:
+    - Logged changes are compacted into the snapshot within one interval
+    - The mutation log is emptied afterwards
+    """
+    headers = seeded_user(test_user["email"], test_user["username"], test_user["password"])
+    save_data_to_file()
+    client.post("/subscriptions", json=TEST_SUBSCRIPTION, headers=headers)
+    assert os.path.getsize(get_log_filepath()) > 0
+    
+    async def check_after_one_interval():
+        writer = asyncio.create_task(storage.run_background_writer(throttle_seconds=0.05))
+        try:
+            # Check before cancelling so the shutdown flush cannot mask a missed interval
+            await asyncio.sleep(0.3)
+            assert os.path.getsize(get_log_filepath()) == 0
+            with open(app_settings.DATA_FILEPATH) as data_file:
+                assert "Netflix" in data_file.read()
+        finally:
+            writer.cancel()
+            with suppress(asyncio.CancelledError):
+                await writer
+    
+    asyncio.run(check_after_one_interval())
+
+def test_concurrent_mutations_share_log_syncs(client, test_user, seeded_user, monkeypatch):
+    """
+    Test concurrent appends to the mutation log
+    
+    Verifies that:
+    - Every concurrent append reports success and is replayed afterwards
+    - Appends queued behind a slow fsync are covered by a shared fsync
+    """
+    seeded_user(test_user["email"], test_user["username"], test_user["password"])
+    save_data_to_file()
+    
+    # A slow disk lets the other threads append while one fsync is running
+    fsync_calls = []
+    original_fsync = os.fsync
+    def slow_fsync(fd):
+        fsync_calls.append(fd)
+        time.sleep(0.05)
+        original_fsync(fd)
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+    
+    records = [
+        {
+            "op": "add_subscription",
+            "email": test_user["email"],
+            "subscription": {**TEST_SUBSCRIPTION, "service_name": f"Service {number}"}
+        }
+        for number in range(8)
+    ]
+    
+    # Release all threads at once so their appends overlap
+    start_barrier = threading.Barrier(len(records))
+    def append_together(record):
+        start_barrier.wait()
+        return log_mutation(record)
+    
+    with ThreadPoolExecutor(max_workers=len(records)) as executor:
+        assert all(executor.map(append_together, records))
+    assert len(fsync_calls) < len(records)
+    
+    user_database.clear()
+    load_data_from_file()
+    assert len(user_database[test_user["email"]].subscriptions) == len(records)
+
+def test_persistence_without_orjson(client, test_user, seeded_user, monkeypatch):
+    """
+    Test the snapshot and mutation log with the standard library JSON fallback
+    
+    Verifies that:
+    - Log records written without orjson are replayed correctly
+    - Snapshots written without orjson load back with the same data
+    """
+    monkeypatch.setattr(storage, "orjson", None)
+    monkeypatch.setattr(storage, "_serialized_users", {})
+    
+    headers = seeded_user(test_user["email"], test_user["username"], test_user["password"])
+    save_data_to_file()
+    client.post("/subscriptions", json=TEST_SUBSCRIPTION, headers=headers)
+    client.put("/subscriptions/Netflix", json={"monthly_price": 19.99}, headers=headers)
+    
+    # Recover from the snapshot plus the log
+    user_database.clear()
+    load_data_from_file()
+    subscriptions = user_database[test_user["email"]].subscriptions
+    assert [sub.service_name for sub in subscriptions] == ["Netflix"]
+    assert subscriptions[0].monthly_price == 19.99
+    assert subscriptions[0].starting_date == date.today()
+    
+    # Compact into a snapshot written by the fallback and load it back
+    assert flush_pending_save()
+    user_database.clear()
+    load_data_from_file()
+    assert user_database[test_user["email"]].subscriptions[0].monthly_price == 19.99
+
+def test_failed_log_writes_roll_back(client, test_user, seeded_user, monkeypatch):
+    """
+    Test changes whose mutation log record cannot be made durable
+    
+    Verifies that:
+    - Each endpoint answers 500 instead of acknowledging the change
+    - The in-memory data is left as it was before the request
+    """
+    headers = seeded_user(test_user["email"], test_user["username"], test_user["password"])
+    client.post("/subscriptions", json=TEST_SUBSCRIPTION, headers=headers)
+    client.post("/subscriptions", json={**TEST_SUBSCRIPTION, "service_name": "Hulu"}, headers=headers)
+    user = user_database[test_user["email"]]
+    before = [sub.model_dump() for sub in user.subscriptions]
+    
+    def failing_fsync(fd):
+        raise OSError("disk unavailable")
+    monkeypatch.setattr(os, "fsync", failing_fsync)
+    
+    requests = [
+        ("post", "/subscriptions", {**TEST_SUBSCRIPTION, "service_name": "Max"}),
+        ("post", "/subscriptions/bulk", [{**TEST_SUBSCRIPTION, "service_name": "Max"}]),
+        ("put", "/subscriptions/Netflix", {"service_name": "Netflix Premium", "monthly_price": 22.99}),
+        ("delete", "/subscriptions/Netflix", None)
+    ]
+    for method, path, body in requests:
+        response = client.request(method, path, json=body, headers=headers)
+        assert response.status_code == 500
+        assert [sub.model_dump() for sub in user.subscriptions] == before
+    
+    assert user.find_subscription("netflix")[0] == 0
+    assert user.find_subscription("hulu")[0] == 1
+    assert list(user.monthly_prices()) == [sub["monthly_price"] for sub in before]
+    
+    response = client.post("/register", json={**test_user, "email": "new@example.com"})
+    assert response.status_code == 500
+    assert "new@example.com" not in user_database
+
+def test_malformed_data_handling(client, test_user, seeded_user):
+    """
+    Test handling of malformed input data
+    
+    Verifies that:
+    - Non-JSON request bodies are rejected properly
+    - Malformed JSON is handled gracefully
+    - Empty request bodies don't crash the server
+    """
+    # Start from a logged-in user
+    headers = seeded_user(test_user["email"], test_user["username"], test_user["password"])
     
     # Test invalid content type (not JSON)
     response = client.post(
@@ -7,8 +7,15 @@ This module verifies that:
 - Edge cases like price limits are handled properly
 - User data is properly isolated between different users
 """
+import sys
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
+from pydantic import ValidationError
+
+from src.app.models.subscription import Subscription
+from src.app.models.user import User
+from src.app.db.storage import user_database
 
 # Test subscription data
 TEST_SUBSCRIPTION = {
@@ -89,7 +96,7 @@ def test_price_edge_cases(authenticated_client):
     response = authenticated_client.post("/subscriptions", json=negative_price_sub)
     assert response.status_code == 422
 
-def test_user_data_isolation(client):
+def test_user_data_isolation(client, seeded_user):
     """
     Test that users can only access their own subscriptions
     
@@ -97,30 +104,9 @@ def test_user_data_isolation(client):
     - Data is properly isolated between users
     - Users cannot see or modify other users' subscriptions
     """
-    # Create two users
-    user1 = {
-        "email": "user1@example.com",
-        "username": "User One",
-        "password": "Password123!"
-    }
-    
-    user2 = {
-        "email": "user2@example.com",
-        "username": "User Two",
-        "password": "Password123!"
-    }
-    
-    # Register both users
-    client.post("/register", json=user1)
-    client.post("/register", json=user2)
-    
-    # Log in as user1
-    login_response = client.post("/login", json={
-        "email": user1["email"],
-        "password": user1["password"]
-    })
-    user1_token = login_response.json()["access_token"]
-    user1_headers = {"Authorization": f"Bearer {user1_token}"}
+    # Create two logged-in users directly in the stores
+    user1_headers = seeded_user("user1@example.com", "User One", "Password123!")
+    user2_headers = seeded_user("user2@example.com", "User Two", "Password123!")
     
     # Add subscription for user1
     user1_sub = {
@@ -131,14 +117,6 @@ def test_user_data_isolation(client):
     response = client.post("/subscriptions", json=user1_sub, headers=user1_headers)
     assert response.status_code == 201
     
-    # Log in as user2
-    login_response = client.post("/login", json={
-        "email": user2["email"],
-        "password": user2["password"]
-    })
-    user2_token = login_response.json()["access_token"]
-    user2_headers = {"Authorization": f"Bearer {user2_token}"}
-    
     # Add subscription for user2
     user2_sub = {
         "service_name": "User2's Service",
@@ -371,4 +349,141 @@ def test_bulk_subscription_operations(authenticated_client):
     response = authenticated_client.get("/analytics/summary")
     summary = response.json()
     assert summary["subscription_count"] == 2
-    assert round(summary["total_monthly_cost"], 2) == round(19.99 + 9.99, 2)
\ No newline at end of file
+    assert round(summary["total_monthly_cost"], 2) == round(19.99 + 9.99, 2)
+
+def test_lookup_after_deleting_earlier_subscription(authenticated_client):
+    """
+    Test name lookups after removing a subscription from the middle
+    
+    Verifies that:
+    - Subscriptions after the deleted one can still be found by name
+    - Names are matched case-insensitively
+    - A renamed subscription is found under its new name only
+    """
+    for name in ("Netflix", "Spotify", "GitHub", "Dropbox"):
+        response = authenticated_client.post("/subscriptions", json={
+            "service_name": name,
+            "monthly_price": 5.0,
+            "category": "Test"
+        })
+        assert response.status_code == 201
+    
+    assert authenticated_client.delete("/subscriptions/Spotify").status_code == 200
+    
+    response = authenticated_client.put("/subscriptions/github", json={"monthly_price": 6.0})
+    assert response.status_code == 200
+    
+    response = authenticated_client.put("/subscriptions/Dropbox", json={"service_name": "Box"})
+    assert response.status_code == 200
+    assert authenticated_client.delete("/subscriptions/Dropbox").status_code == 404
+    assert authenticated_client.delete("/subscriptions/box").status_code == 200
+    
+    subscriptions = authenticated_client.get("/subscriptions").json()
+    assert [s["service_name"] for s in subscriptions] == ["Netflix", "GitHub"]
+    assert subscriptions[1]["monthly_price"] == 6.0
+
+def test_rename_to_padded_existing_name(authenticated_client):
+    """
+    Test renaming a subscription to an existing name wrapped in whitespace
+    
+    Verifies that:
+    - The conflict is detected on the stripped name and rejected
+    - Both subscriptions stay reachable under their own names
+    - The user model refuses to index a name used at another position
+    """
+    for name in ("Netflix", "Spotify"):
+        authenticated_client.post("/subscriptions", json={**TEST_SUBSCRIPTION, "service_name": name})
+    
+    response = authenticated_client.put("/subscriptions/Spotify", json={"service_name": " Netflix "})
+    assert response.status_code == 409
+    
+    subscriptions = authenticated_client.get("/subscriptions").json()
+    assert [s["service_name"] for s in subscriptions] == ["Netflix", "Spotify"]
+    assert authenticated_client.delete("/subscriptions/Spotify").status_code == 200
+    assert authenticated_client.delete("/subscriptions/Netflix").status_code == 200
+    
+    user = User(username="indexed", passhash="x" * 64, email="indexed@example.com")
+    user.add_subscription(Subscription(**{**TEST_SUBSCRIPTION, "service_name": "Netflix"}))
+    user.add_subscription(Subscription(**{**TEST_SUBSCRIPTION, "service_name": "Spotify"}))
+    with pytest.raises(ValueError):
+        user.replace_subscription(1, Subscription(**{**TEST_SUBSCRIPTION, "service_name": "netflix"}))
+    assert user.find_subscription("netflix")[0] == 0
+    assert user.find_subscription("spotify")[0] == 1
+
+def test_concurrent_changes_keep_indexes_aligned(authenticated_client):
+    """
+    Test concurrent subscription changes from several threads
+    
+    Verifies that:
+    - The name index points at the right list position afterwards
+    - The price array stays in step with the subscription list
+    """
+    # Force frequent thread switches so unguarded updates would interleave
+    original_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        def change_subscriptions(worker):
+            for number in range(10):
+                name = f"Worker{worker} Service{number}"
+                authenticated_client.post("/subscriptions", json={**TEST_SUBSCRIPTION, "service_name": name, "monthly_price": float(number)})
+                if number % 3 == 0:
+                    authenticated_client.delete(f"/subscriptions/{name}")
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(change_subscriptions, range(4)))
+    finally:
+        sys.setswitchinterval(original_interval)
+    
+    user = next(iter(user_database.values()))
+    for position, subscription in enumerate(user.subscriptions):
+        assert user.find_subscription(subscription.service_name)[0] == position
+    assert list(user.monthly_prices()) == [sub.monthly_price for sub in user.subscriptions]
+    assert len(user.subscriptions) == 4 * 6
+
+def test_subscriptions_are_immutable():
+    """
+    Test that stored subscriptions cannot be modified in place
+    
+    Verifies that:
+    - Assigning to a field raises instead of bypassing the user's indexes
+    """
+    subscription = Subscription(**TEST_SUBSCRIPTION)
+    with pytest.raises(ValidationError):
+        subscription.monthly_price = 1.0
+    assert subscription.monthly_price == 15.99
+
+def test_bulk_add_subscriptions(authenticated_client):
+    """
+    Test adding several subscriptions in one request
+    
+    Verifies that:
+    - All subscriptions in a valid batch are added
+    - A batch with a duplicate name is rejected as a whole
+    """
+    batch = [
+        {**TEST_SUBSCRIPTION, "service_name": "Bulk One"},
+        {**TEST_SUBSCRIPTION, "service_name": "Bulk Two"}
+    ]
+    response = authenticated_client.post("/subscriptions/bulk", json=batch)
+    assert response.status_code == 201
+    assert response.json()["services"] == ["Bulk One", "Bulk Two"]
+    
+    # One name clashes with an existing subscription (case-insensitive)
+    batch = [
+        {**TEST_SUBSCRIPTION, "service_name": "Bulk Three"},
+        {**TEST_SUBSCRIPTION, "service_name": "bulk one"}
+    ]
+    response = authenticated_client.post("/subscriptions/bulk", json=batch)
+    assert response.status_code == 409
+    
+    # Two names clash within the batch itself
+    batch = [
+        {**TEST_SUBSCRIPTION, "service_name": "Bulk Four"},
+        {**TEST_SUBSCRIPTION, "service_name": "BULK FOUR"}
+    ]
+    response = authenticated_client.post("/subscriptions/bulk", json=batch)
+    assert response.status_code == 409
+    
+    # Rejected batches leave the subscription list untouched
+    names = [sub["service_name"] for sub in authenticated_client.get("/subscriptions").json()]
+    assert names == ["Bulk One", "Bulk Two"]
@@ -6,12 +6,18 @@ This module verifies that:
 - Health check endpoint responds correctly
 - API documentation is available
 - Error handling works correctly
+- Buffered log records are written out on time
 """
+import logging
+import time
+
 import pytest
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.testclient import TestClient
 
+from src.app.core.logging import BufferedFileHandler
+
 def test_home_endpoint(client):
     """
     Test the root endpoint
@@ -29,6 +35,18 @@ def test_home_endpoint(client):
         assert "version" in data
         assert "status" in data
         assert data["status"] == "healthy"
+    
+    # Revalidating with the ETag returns an empty 304
+    etag = response.headers["etag"]
+    cached_response = client.get("/", headers={"If-None-Match": etag})
+    assert cached_response.status_code == 304
+    assert cached_response.headers["etag"] == etag
+    assert cached_response.content == b""
+    
+    # Weak validators, lists and wildcards match like on the analytics endpoints
+    for if_none_match in (f"W/{etag}", f'"stale", {etag}', "*"):
+        assert client.get("/", headers={"If-None-Match": if_none_match}).status_code == 304
+    assert client.get("/", headers={"If-None-Match": '"stale"'}).status_code == 200
 
 def test_health_check(client):
     """
@@ -84,4 +102,25 @@ def test_global_error_handler():
     assert response.json()["detail"] == "Internal server error"
     
     # Error message should not contain the actual exception message
-    assert "Test unexpected error" not in response.text
\ No newline at end of file
+    assert "Test unexpected error" not in response.text
+
+def test_buffered_log_file_flushes_on_interval(tmp_path):
+    """
+    Test that buffered log records reach the file without further logging
+    
+    Verifies that:
+    - INFO records are held in the file buffer at first
+    - They are written out once the flush interval has passed
+    """
+    log_path = tmp_path / "buffered.log"
+    handler = BufferedFileHandler(log_path, flush_interval=0.2)
+    try:
+        handler.handle(logging.LogRecord("subhub", logging.INFO, __file__, 0, "quiet line", None, None))
+        assert "quiet line" not in log_path.read_text()
+        
+        deadline = time.monotonic() + 2.0
+        while "quiet line" not in log_path.read_text() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert "quiet line" in log_path.read_text()
+    finally:
+        handler.close()
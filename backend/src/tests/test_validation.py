@@ -10,7 +10,20 @@ This module verifies that:
 """
 import pytest
 
-def test_invalid_email_formats(client):
+VALID_REGISTRATION = {
+    "email": "test@example.org",
+    "username": "Test User",
+    "password": "Valid!Password123"
+}
+
+@pytest.mark.parametrize("email, should_accept", [
+    ("notanemail", False),
+    ("missing@tld", False),
+    ("spaces not allowed@example.com", False),
+    ("valid+plus@example.com", True),
+    ("valid.dots@example.co.uk", True)
+])
+def test_invalid_email_formats(client, email, should_accept):
     """
     Test validation of email formats during registration
     
@@ -18,30 +31,21 @@ def test_invalid_email_formats(client):
     - Various invalid email formats are rejected
     - Valid but unusual email formats are accepted
     """
-    test_cases = [
-        # (email, should_accept)
-        ("notanemail", False),
-        ("missing@tld", False),
-        ("spaces not allowed@example.com", False),
-        ("valid+plus@example.com", True),
-        ("valid.dots@example.co.uk", True)
-    ]
+    response = client.post("/register", json={**VALID_REGISTRATION, "email": email})
     
-    for email, should_accept in test_cases:
-        test_user_data = {
-            "email": email,
-            "username": "Test User",
-            "password": "Valid!Password123"
-        }
-        
-        response = client.post("/register", json=test_user_data)
-        
-        if should_accept:
-            assert response.status_code == 201, f"Email '{email}' should be accepted"
-        else:
-            assert response.status_code == 422, f"Email '{email}' should be rejected"
+    if should_accept:
+        assert response.status_code == 201, f"Email '{email}' should be accepted"
+    else:
+        assert response.status_code == 422, f"Email '{email}' should be rejected"
 
-def test_password_strength_validation(client):
+@pytest.mark.parametrize("password, should_accept", [
+    ("short", False),  # Too short
+    ("longenoughbutnospecial123", False),  # No special characters
+    ("Longenough!butnonumber", False),  # No numbers
+    ("longenough!123nouppercase", False),  # No uppercase
+    ("Valid!Password123", True)  # Valid password
+])
+def test_password_strength_validation(client, password, should_accept):
     """
     Test password strength validation rules
     
@@ -50,30 +54,15 @@ def test_password_strength_validation(client):
     - Strong passwords are accepted
     - Password complexity requirements are enforced
     """
-    test_cases = [
-        # (password, should_accept)
-        ("short", False),  # Too short
-        ("longenoughbutnospecial123", False),  # No special characters
-        ("Longenough!butnonumber", False),  # No numbers
-        ("longenough!123nouppercase", False),  # No uppercase
-        ("Valid!Password123", True)  # Valid password
-    ]
+    response = client.post("/register", json={**VALID_REGISTRATION, "password": password})
     
-    for password, should_accept in test_cases:
-        test_user_data = {
-            "email": "test@example.org",
-            "username": "Test User",
-            "password": password
-        }
-        
-        response = client.post("/register", json=test_user_data)
-        
-        if should_accept:
-            assert response.status_code == 201, f"Password '{password}' should be accepted"
-        else:
-            assert response.status_code == 422, f"Password '{password}' should be rejected"
+    if should_accept:
+        assert response.status_code == 201, f"Password '{password}' should be accepted"
+    else:
+        assert response.status_code == 422, f"Password '{password}' should be rejected"
 
-def test_empty_fields_validation(client):
+@pytest.mark.parametrize("empty_field", ["email", "password", "username"])
+def test_empty_fields_validation(client, empty_field):
     """
     Test validation of empty required fields
     
@@ -82,26 +71,9 @@ def test_empty_fields_validation(client):
     - Empty password is rejected
     - Empty username is rejected
     """
-    test_cases = [
-        # Field to leave empty
-        "email",
-        "password",
-        "username"
-    ]
-    
-    valid_data = {
-        "email": "test@example.org",
-        "username": "Test User",
-        "password": "Valid!Password123"
-    }
-    
-    for empty_field in test_cases:
-        # Create a copy of valid data with one field empty
-        test_data = valid_data.copy()
-        test_data[empty_field] = ""
-        
-        response = client.post("/register", json=test_data)
-        assert response.status_code == 422, f"Empty {empty_field} should be rejected"
+    # Send otherwise valid data with one field left empty
+    response = client.post("/register", json={**VALID_REGISTRATION, empty_field: ""})
+    assert response.status_code == 422, f"Empty {empty_field} should be rejected"
 
 def test_login_with_invalid_credentials(client, test_user):
     """
@@ -131,7 +103,7 @@ def test_login_with_invalid_credentials(client, test_user):
     assert response.status_code == 401
     assert "incorrect password" in response.json()["detail"].lower()
 
-def test_invalid_data_types(client, test_user):
+def test_invalid_data_types(client, test_user, seeded_user):
     """
     Test validation of data types
     
@@ -140,14 +112,8 @@ def test_invalid_data_types(client, test_user):
     - Non-string password is rejected
     - Numeric values for string fields are rejected
     """
-    # Register valid user first
-    client.post("/register", json=test_user)
-    login_response = client.post("/login", json={
-        "email": test_user["email"],
-        "password": test_user["password"]
-    })
-    token = login_response.json()["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
+    # Start from a logged-in user without going through /register and /login
+    headers = seeded_user(test_user["email"], test_user["username"], test_user["password"])
     
     # Try adding subscription with wrong data types
     invalid_sub = {